@@ -0,0 +1,61 @@
+import pandas as pd
+import perfil
+
+# --- Análise da Frota ---
+# Todas as métricas são calculadas de uma vez para todos os veículos, com
+# agrupamentos sobre a tabela de transações inteira (sem filtrar por placa).
+
+# As faturas registram o período da locação na descrição da transação.
+PADRAO_PERIODO = r"Período: (\d{2}/\d{2}/\d{4}) a (\d{2}/\d{2}/\d{4})"
+
+
+def converter_datas(serie):
+    """Datas em dd/mm/aaaa ou aaaa-mm-dd (NaT se inválida).
+
+    Os formatos são explícitos: com format="mixed" e dayfirst=True o pandas
+    troca dia e mês em datas ISO como "2025-03-01".
+    """
+    texto = serie.fillna("").astype(str).str.strip()
+    brasileira = pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+    return brasileira.fillna(pd.to_datetime(texto, format="%Y-%m-%d", errors="coerce"))
+
+def descricao_fatura(num_fatura, nome_cliente, inicio, fim):
+    """Descrição gravada na transação de uma fatura, incluindo o período locado."""
+    return f"Fatura Nº {num_fatura} - Cliente: {nome_cliente} - Período: {inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}"
+
+def dias_locados(df_transacoes, data_inicio, data_fim):
+    """Dias locados por placa dentro de [data_inicio, data_fim], a partir dos períodos das faturas."""
+    alugueis = df_transacoes[(df_transacoes["Tipo"] == "Entrada") & (df_transacoes["Categoria"] == "Aluguel")]
+    periodos = alugueis["Descricao"].astype(str).str.extract(PADRAO_PERIODO)
+    inicio = pd.to_datetime(periodos[0], format="%d/%m/%Y", errors="coerce").clip(lower=data_inicio)
+    fim = pd.to_datetime(periodos[1], format="%d/%m/%Y", errors="coerce").clip(upper=data_fim)
+    dias = ((fim - inicio).dt.days + 1).clip(lower=0).fillna(0)
+    return dias.groupby(alugueis["Placa"]).sum()
+
+@perfil.medir("analisar_frota", linhas=lambda _, df_transacoes, *__: len(df_transacoes))
+def analisar_frota(df_transacoes, df_veiculos, data_inicio, data_fim):
+    """Receitas, despesas, lucro e utilização por veículo e a evolução mensal da frota no período.
+
+    Retorna (por_veiculo, mensal): `por_veiculo` tem uma linha por placa
+    cadastrada; `mensal` tem uma linha por mês com receitas, despesas e lucro.
+    """
+    data_inicio, data_fim = pd.Timestamp(data_inicio), pd.Timestamp(data_fim)
+    datas = df_transacoes["Data"]
+    no_periodo = df_transacoes[(datas >= data_inicio.strftime('%Y-%m-%d')) & (datas <= data_fim.strftime('%Y-%m-%d'))]
+
+    totais = no_periodo.pivot_table(index="Placa", columns="Tipo", values="Valor", aggfunc="sum", fill_value=0.0)
+    totais = totais.reindex(columns=["Entrada", "Saída"], fill_value=0.0)
+    por_veiculo = df_veiculos.set_index("Placa")[["Marca", "Modelo"]]
+    por_veiculo = por_veiculo[~por_veiculo.index.duplicated()].copy()
+    por_veiculo["Receitas"] = totais["Entrada"].reindex(por_veiculo.index, fill_value=0.0)
+    por_veiculo["Despesas"] = totais["Saída"].reindex(por_veiculo.index, fill_value=0.0)
+    por_veiculo["Lucro"] = por_veiculo["Receitas"] - por_veiculo["Despesas"]
+    dias_periodo = (data_fim - data_inicio).days + 1
+    por_veiculo["Dias Locados"] = dias_locados(df_transacoes, data_inicio, data_fim).reindex(por_veiculo.index, fill_value=0).clip(upper=dias_periodo).astype(int)
+    por_veiculo["Utilização (%)"] = 100.0 * por_veiculo["Dias Locados"] / dias_periodo
+
+    mensal = no_periodo.pivot_table(index=no_periodo["Data"].str[:7].rename("Mês"), columns="Tipo", values="Valor", aggfunc="sum", fill_value=0.0)
+    mensal = mensal.reindex(columns=["Entrada", "Saída"], fill_value=0.0).rename(columns={"Entrada": "Receitas", "Saída": "Despesas"})
+    mensal.columns.name = None
+    mensal["Lucro"] = mensal["Receitas"] - mensal["Despesas"]
+    return por_veiculo, mensal
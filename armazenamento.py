@@ -0,0 +1,567 @@
+import os
+import time
+import sqlite3
+import tempfile
+import contextlib
+import operator
+import threading
+import argparse
+import pandas as pd
+import perfil
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- CONSTANTES DE ARQUIVOS ---
+ARQUIVO_CLIENTES = "clientes.csv"
+ARQUIVO_VEICULOS = "veiculos.csv"
+ARQUIVO_FATURAS = "ultima_fatura.txt"
+ARQUIVO_TRANSACOES = "transacoes.csv"
+
+colunas_clientes = ["Nome", "CPF/CNPJ", "Endereço", "Município", "UF", "CEP", "Telefone", "Email"]
+colunas_veiculos = ["Placa", "Marca", "Modelo", "Ano", "Cor"]
+colunas_transacoes = ["Placa", "Data", "Tipo", "Valor", "Categoria", "Descricao"]
+
+# Tipos das colunas, decididos uma única vez para todos os arquivos.
+CONVERSORES = {col: str for col in ['CPF/CNPJ', 'CEP', 'Placa', 'Telefone']}
+TIPOS_COLUNAS = {'Valor': 'float64', 'Ano': 'Int64'}
+
+# --- CONFIGURAÇÃO DO ARMAZENAMENTO ---
+# LOCAUTO_BACKEND=sqlite grava tudo em um banco SQLite local (LOCAUTO_BANCO)
+# em vez dos arquivos CSV. Os nomes de arquivo acima continuam sendo usados
+# como identificadores das tabelas, de modo que o resto do sistema não muda.
+BACKEND = os.environ.get("LOCAUTO_BACKEND", "csv").lower()
+ARQUIVO_BANCO = os.environ.get("LOCAUTO_BANCO", "locauto.db")
+
+TABELAS = {
+    ARQUIVO_CLIENTES: ("clientes", colunas_clientes),
+    ARQUIVO_VEICULOS: ("veiculos", colunas_veiculos),
+    ARQUIVO_TRANSACOES: ("transacoes", colunas_transacoes),
+}
+INDICES_SQLITE = {
+    "clientes": [("Nome",), ("CPF/CNPJ",)],
+    "veiculos": [("Placa",)],
+    "transacoes": [("Placa", "Data"), ("Data",)],
+}
+
+def usando_sqlite():
+    return BACKEND == "sqlite"
+
+
+# --- Travas e Escrita Atômica ---
+# Várias sessões do Streamlit (e processos como a importação em lote) podem
+# gravar nos mesmos arquivos. Toda escrita acontece com o arquivo travado por
+# uma trava do sistema operacional (flock, ou msvcrt.locking no Windows) sobre
+# "<arquivo>.trava", e reescritas completas vão para um temporário que
+# substitui o original de uma vez com os.replace. O sistema solta a trava se o
+# processo morrer, então não há trava abandonada a adivinhar pela idade; o
+# arquivo .trava nunca é apagado, pois quem já o abriu continuaria travando o
+# arquivo antigo enquanto outro processo criaria um novo.
+TEMPO_MAXIMO_TRAVA = 30
+_travas_da_thread = threading.local()
+
+def _tentar_travar(descritor):
+    """Trava o arquivo aberto sem esperar; False se outro processo ou thread já o travou."""
+    try:
+        if fcntl: fcntl.flock(descritor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else: msvcrt.locking(descritor, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _destravar(descritor):
+    try:
+        if fcntl: fcntl.flock(descritor, fcntl.LOCK_UN)
+        else: msvcrt.locking(descritor, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(descritor)
+
+@contextlib.contextmanager
+def trava_arquivo(caminho):
+    """Trava `caminho` entre processos e threads. Pode ser aninhada na mesma thread."""
+    caminho_trava = os.path.abspath(f"{caminho}.trava")
+    contagem = _travas_da_thread.__dict__.setdefault("contagem", {})
+    if contagem.get(caminho_trava):
+        contagem[caminho_trava] += 1
+        try: yield
+        finally: contagem[caminho_trava] -= 1
+        return
+    limite = time.monotonic() + TEMPO_MAXIMO_TRAVA
+    # Cada chamada abre o próprio descritor: a trava vale também entre threads do mesmo processo.
+    descritor = os.open(caminho_trava, os.O_CREAT | os.O_RDWR)
+    try:
+        while not _tentar_travar(descritor):
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Não foi possível travar {caminho}: outro usuário está gravando.")
+            time.sleep(0.005)
+    except BaseException:
+        os.close(descritor)
+        raise
+    contagem[caminho_trava] = 1
+    try: yield
+    finally:
+        contagem[caminho_trava] = 0
+        _destravar(descritor)
+
+@perfil.medir("escrever_atomico", arquivo=lambda caminho, *_: caminho, modo="gravado")
+def escrever_atomico(caminho, escrever):
+    """Chama `escrever(caminho_temporario)` e troca o arquivo final pelo temporário."""
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix=f".{os.path.basename(caminho)}.", suffix=".tmp", dir=diretorio)
+    os.close(descritor)
+    try:
+        escrever(temporario)
+        for tentativa in range(50):
+            try:
+                os.replace(temporario, caminho)
+                return
+            except PermissionError:
+                # No Windows a troca falha enquanto outro processo lê o arquivo.
+                if tentativa == 49: raise
+                time.sleep(0.01)
+    finally:
+        if os.path.exists(temporario): os.remove(temporario)
+
+
+# --- Registro de Exclusões (lápides) ---
+# Os arquivos de dados só crescem: inclusões são anexadas ao final e exclusões
+# são anotadas no arquivo "<nome>.excluidos" com a posição da linha removida.
+# A posição de uma linha só muda na compactação, que reescreve o arquivo e
+# zera o registro de exclusões. No SQLite as exclusões são imediatas.
+def arquivo_exclusoes(nome_arquivo):
+    return f"{nome_arquivo}.excluidos"
+
+def ler_exclusoes(nome_arquivo):
+    if usando_sqlite(): return set()
+    return _ler_exclusoes_csv(nome_arquivo)
+
+def _ler_exclusoes_csv(nome_arquivo):
+    try:
+        with open(arquivo_exclusoes(nome_arquivo), "r") as f:
+            return {int(linha) for linha in f if linha.strip()}
+    except FileNotFoundError: return set()
+
+def _remover_exclusoes(nome_arquivo):
+    try: os.remove(arquivo_exclusoes(nome_arquivo))
+    except FileNotFoundError: pass
+
+
+# --- Cache de Leitura ---
+# Cada conjunto de dados lido fica em memória junto com a sua assinatura: mtime
+# e tamanho do arquivo e do registro de exclusões ou, no SQLite, a versão da
+# tabela (ver `_versao_sqlite`). Enquanto a assinatura não muda, a leitura
+# devolve o DataFrame já carregado; as funções de escrita deste módulo leem a
+# assinatura sob a trava do arquivo ou dentro da transação e atualizam a
+# entrada no lugar em vez de descartá-la.
+_cache = {}
+_trava_cache = threading.RLock()
+
+def _fonte(nome_arquivo):
+    """Chave do cache e arquivos que compõem a assinatura de um conjunto de dados CSV."""
+    if usando_sqlite():
+        return f"{os.path.abspath(ARQUIVO_BANCO)}#{_tabela(nome_arquivo)[0]}", ()
+    return os.path.abspath(nome_arquivo), (nome_arquivo, arquivo_exclusoes(nome_arquivo))
+
+def _assinatura(caminhos):
+    assinatura = []
+    for caminho in caminhos:
+        try:
+            info = os.stat(caminho)
+            assinatura.append((info.st_mtime_ns, info.st_size))
+        except FileNotFoundError: assinatura.append(None)
+    return tuple(assinatura)
+
+def _assinatura_atual(nome_arquivo, con=None):
+    """Assinatura do conjunto no disco; no SQLite lida em `con` se informada (dentro da transação)."""
+    if usando_sqlite():
+        return _versao_sqlite(_tabela(nome_arquivo)[0], con)
+    return _assinatura(_fonte(nome_arquivo)[1])
+
+def _entrada_valida(nome_arquivo, con=None):
+    """Entrada do cache (df, total de linhas no arquivo, derivados) se ainda corresponder ao disco."""
+    entrada = _cache.get(_fonte(nome_arquivo)[0])
+    if entrada and entrada[0] == _assinatura_atual(nome_arquivo, con):
+        return entrada[1:]
+    return None
+
+def _guardar_no_cache(nome_arquivo, df, total_linhas, derivados=None, assinatura=None):
+    if assinatura is None: assinatura = _assinatura_atual(nome_arquivo)
+    _cache[_fonte(nome_arquivo)[0]] = (assinatura, df, total_linhas, {} if derivados is None else derivados)
+
+def _descartar_do_cache(nome_arquivo):
+    _cache.pop(_fonte(nome_arquivo)[0], None)
+
+def limpar_cache():
+    with _trava_cache: _cache.clear()
+
+def _tipar(df):
+    """Aplica TIPOS_COLUNAS; nas demais colunas (texto) o vazio é sempre "" e nunca NaN/None.
+
+    Vale para o que é lido do CSV ou do SQLite e para as linhas anexadas ao
+    cache, de modo que o cache fica idêntico a uma releitura do disco.
+    """
+    texto = {col: df[col].fillna("").astype(str) for col in df.columns if col not in TIPOS_COLUNAS}
+    return df.astype({col: tipo for col, tipo in TIPOS_COLUNAS.items() if col in df.columns}).assign(**texto)
+
+
+# --- Estruturas Derivadas ---
+# Outros módulos podem registrar estruturas calculadas a partir de um conjunto
+# de dados (resumos, índices de busca). Elas ficam junto da entrada do cache:
+# são construídas na primeira consulta, atualizadas no lugar a cada inclusão ou
+# exclusão feita por este módulo e descartadas quando o conjunto é relido do
+# disco ou reescrito por inteiro.
+_derivados_registrados = {}
+
+def registrar_derivado(nome_arquivo, nome, construir, incluir, excluir):
+    """Registra `construir(df)`, `incluir(estrutura, df_novos)` e `excluir(estrutura, df_removidos)`."""
+    _derivados_registrados[(nome_arquivo, nome)] = (construir, incluir, excluir)
+
+def consultar_derivado(nome_arquivo, colunas, nome, consulta):
+    """Executa `consulta(estrutura)` sob a trava do cache, construindo a estrutura se preciso."""
+    with _trava_cache:
+        df = carregar_dados(nome_arquivo, colunas)
+        derivados = _cache[_fonte(nome_arquivo)[0]][3]
+        if nome not in derivados:
+            derivados[nome] = _derivados_registrados[(nome_arquivo, nome)][0](df)
+        return consulta(derivados[nome])
+
+def descartar_derivado(nome_arquivo, nome):
+    """Força a reconstrução da estrutura na próxima consulta."""
+    with _trava_cache:
+        entrada = _cache.get(_fonte(nome_arquivo)[0])
+        if entrada: entrada[3].pop(nome, None)
+
+def _atualizar_derivados(nome_arquivo, derivados, posicao, df_linhas):
+    for nome, estrutura in derivados.items():
+        _derivados_registrados[(nome_arquivo, nome)][posicao](estrutura, df_linhas)
+
+
+# --- Backend CSV ---
+def _criar_arquivo_vazio(nome_arquivo, colunas):
+    escrever_atomico(nome_arquivo, lambda temporario: pd.DataFrame(columns=colunas).to_csv(temporario, index=False))
+
+@perfil.medir("_ler_csv", linhas=lambda resultado, *_: resultado[1], arquivo=lambda nome_arquivo, *_: nome_arquivo)
+def _ler_csv(nome_arquivo, colunas):
+    """Lê um arquivo CSV aplicando as exclusões. Retorna (df, total de linhas no arquivo)."""
+    if not os.path.exists(nome_arquivo):
+        _criar_arquivo_vazio(nome_arquivo, colunas)
+    df = _tipar(pd.read_csv(nome_arquivo, converters=CONVERSORES, dtype=TIPOS_COLUNAS))
+    total_linhas = len(df)
+    excluidos = _ler_exclusoes_csv(nome_arquivo)
+    if excluidos:
+        df = df.drop(index=list(excluidos), errors='ignore')
+    return df, total_linhas
+
+@perfil.medir("_anexar_csv", linhas=lambda _, df, *__: len(df), arquivo=lambda _, nome_arquivo, *__: nome_arquivo, modo="anexado")
+def _anexar_csv(df_novos, nome_arquivo, colunas):
+    if not os.path.exists(nome_arquivo):
+        _criar_arquivo_vazio(nome_arquivo, colunas)
+    with open(nome_arquivo, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n": f.write(b"\n")
+    df_novos.to_csv(nome_arquivo, mode='a', header=False, index=False)
+
+
+# --- Backend SQLite ---
+# Cada tabela tem uma chave "id" que faz o papel da posição da linha no CSV:
+# é o índice dos DataFrames devolvidos e o que `excluir_linhas` recebe.
+_bancos_preparados = set()
+
+def _tabela(nome_arquivo):
+    if nome_arquivo in TABELAS: return TABELAS[nome_arquivo]
+    raise ValueError(f"Arquivo sem tabela correspondente no banco: {nome_arquivo}")
+
+def _q(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+def _tipo_sql(coluna):
+    return {'Valor': 'REAL', 'Ano': 'INTEGER'}.get(coluna, 'TEXT')
+
+def _nome_indice(tabela, colunas):
+    return "idx_" + tabela + "_" + "_".join("".join(c for c in col if c.isalnum()).lower() for col in colunas)
+
+# Resumo materializado das transações por veículo, mês, tipo e categoria. Os
+# gatilhos o mantêm dentro da mesma transação de cada inclusão ou exclusão.
+def _chave_resumo(linha):
+    return (f"COALESCE({linha}.Placa, ''), substr(COALESCE({linha}.Data, ''), 1, 7), "
+            f"COALESCE({linha}.Tipo, ''), COALESCE({linha}.Categoria, '')")
+
+SQL_RESUMO = [
+    """CREATE TABLE IF NOT EXISTS resumo_transacoes (
+        Placa TEXT NOT NULL, Mes TEXT NOT NULL, Tipo TEXT NOT NULL, Categoria TEXT NOT NULL,
+        Total REAL NOT NULL, Quantidade INTEGER NOT NULL,
+        PRIMARY KEY (Placa, Mes, Tipo, Categoria))""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_resumo_inclusao AFTER INSERT ON transacoes BEGIN
+        INSERT INTO resumo_transacoes VALUES ({_chave_resumo('NEW')}, COALESCE(NEW.Valor, 0), 1)
+        ON CONFLICT (Placa, Mes, Tipo, Categoria) DO UPDATE SET Total = Total + excluded.Total, Quantidade = Quantidade + 1;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_resumo_exclusao AFTER DELETE ON transacoes BEGIN
+        UPDATE resumo_transacoes SET Total = Total - COALESCE(OLD.Valor, 0), Quantidade = Quantidade - 1
+        WHERE (Placa, Mes, Tipo, Categoria) = ({_chave_resumo('OLD')});
+        DELETE FROM resumo_transacoes WHERE (Placa, Mes, Tipo, Categoria) = ({_chave_resumo('OLD')}) AND Quantidade <= 0;
+    END""",
+]
+
+# Versão de cada tabela, incrementada pelos gatilhos a cada linha incluída,
+# alterada ou excluída (também por programas externos). É a assinatura do
+# cache no SQLite: vale só para a própria tabela e, lida dentro da transação
+# de uma gravação, é exatamente a versão que o COMMIT publica.
+SQL_VERSOES = ["CREATE TABLE IF NOT EXISTS versoes (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL)"] + [
+    comando for tabela, _ in TABELAS.values() for comando in (
+        f"INSERT OR IGNORE INTO versoes VALUES ('{tabela}', 0)",
+        *(f"""CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{evento.lower()} AFTER {evento} ON {tabela} BEGIN
+            UPDATE versoes SET versao = versao + 1 WHERE tabela = '{tabela}';
+        END""" for evento in ("INSERT", "UPDATE", "DELETE")))
+]
+_conexoes_versao = {}
+
+def _versao_sqlite(tabela, con=None):
+    """Versão atual de `tabela`. Sem `con`, usa uma conexão aberta por banco (sempre sob `_trava_cache`)."""
+    if con is None:
+        banco = os.path.abspath(ARQUIVO_BANCO)
+        con = _conexoes_versao.get(banco)
+        if con is None: con = _conexoes_versao[banco] = _conectar(check_same_thread=False)
+    # fetchall encerra a consulta e libera a trava de leitura do banco
+    return con.execute("SELECT versao FROM versoes WHERE tabela = ?", (tabela,)).fetchall()[0][0]
+
+def _reconstruir_resumo_sqlite(con):
+    con.execute("DELETE FROM resumo_transacoes")
+    con.execute(f"""INSERT INTO resumo_transacoes
+        SELECT {_chave_resumo('transacoes')}, SUM(COALESCE(Valor, 0)), COUNT(*) FROM transacoes GROUP BY 1, 2, 3, 4""")
+
+def reconstruir_resumo_sqlite():
+    with _Transacao() as con: _reconstruir_resumo_sqlite(con)
+
+def _conectar(**opcoes):
+    con = sqlite3.connect(ARQUIVO_BANCO, timeout=30, isolation_level=None, **opcoes)
+    banco = os.path.abspath(ARQUIVO_BANCO)
+    if banco not in _bancos_preparados:
+        for tabela, colunas in TABELAS.values():
+            definicoes = ", ".join(f"{_q(col)} {_tipo_sql(col)}" for col in colunas)
+            con.execute(f"CREATE TABLE IF NOT EXISTS {tabela} (id INTEGER PRIMARY KEY, {definicoes})")
+            for indice in INDICES_SQLITE.get(tabela, []):
+                con.execute(f"CREATE INDEX IF NOT EXISTS {_nome_indice(tabela, indice)} ON {tabela} ({', '.join(map(_q, indice))})")
+        resumo_existia = con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumo_transacoes'").fetchone()
+        for comando in SQL_RESUMO + SQL_VERSOES: con.execute(comando)
+        if not resumo_existia:
+            con.execute("BEGIN IMMEDIATE")
+            _reconstruir_resumo_sqlite(con)
+            con.execute("COMMIT")
+        _bancos_preparados.add(banco)
+    return con
+
+def consultar_sqlite(sql, parametros=()):
+    """Executa uma consulta de leitura no banco e devolve um DataFrame."""
+    con = _conectar()
+    try: return pd.read_sql_query(sql, con, params=list(parametros))
+    finally: con.close()
+
+class _Transacao:
+    """Abre uma conexão com `BEGIN IMMEDIATE` e confirma (ou desfaz) ao sair."""
+    def __enter__(self):
+        self.con = _conectar()
+        self.con.execute("BEGIN IMMEDIATE")
+        return self.con
+
+    def __exit__(self, tipo_erro, erro, rastro):
+        try: self.con.execute("ROLLBACK" if tipo_erro else "COMMIT")
+        finally: self.con.close()
+
+def _linhas_sql(df, colunas):
+    df = df.reindex(columns=colunas).astype(object)
+    return df.where(df.notna(), None).itertuples(index=False, name=None)
+
+@perfil.medir("_ler_sqlite", linhas=lambda df, *_: len(df))
+def _ler_sqlite(nome_arquivo, where="", parametros=(), con=None):
+    """Lê a tabela; com `con`, dentro da transação já aberta nessa conexão."""
+    tabela, colunas = _tabela(nome_arquivo)
+    conexao = con or _conectar()
+    try:
+        df = pd.read_sql_query(f"SELECT id, {', '.join(map(_q, colunas))} FROM {tabela} {where} ORDER BY id", conexao, params=list(parametros), index_col="id")
+    finally:
+        if con is None: conexao.close()
+    df.index.name = None
+    return _tipar(df)
+
+def _inserir_sqlite(con, tabela, colunas, df, primeiro_id):
+    marcadores = ", ".join("?" * (len(colunas) + 1))
+    ids = range(primeiro_id, primeiro_id + len(df))
+    con.executemany(f"INSERT INTO {tabela} (id, {', '.join(map(_q, colunas))}) VALUES ({marcadores})",
+                    ((id_linha, *linha) for id_linha, linha in zip(ids, _linhas_sql(df, colunas))))
+    return ids
+
+def _anexar_sqlite(con, df_novos, nome_arquivo):
+    tabela, colunas = _tabela(nome_arquivo)
+    primeiro_id = con.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {tabela}").fetchone()[0]
+    return _inserir_sqlite(con, tabela, colunas, df_novos, primeiro_id)
+
+def _substituir_sqlite(con, df, nome_arquivo):
+    tabela, colunas = _tabela(nome_arquivo)
+    con.execute(f"DELETE FROM {tabela}")
+    return _inserir_sqlite(con, tabela, colunas, df, 1)
+
+
+# --- Leitura e Escrita ---
+@perfil.medir("carregar_dados", linhas=lambda df, *_: len(df))
+def carregar_dados(nome_arquivo, colunas):
+    """Lê o conjunto de dados inteiro ignorando as linhas excluídas.
+
+    O índice do DataFrame retornado identifica cada linha (posição no CSV
+    ou "id" no SQLite) e é ele que deve ser passado para `excluir_linhas`.
+    O DataFrame é compartilhado pelo cache e não deve ser alterado no lugar.
+    """
+    with _trava_cache:
+        entrada = _entrada_valida(nome_arquivo)
+        if entrada: return entrada[0]
+        chave, caminhos = _fonte(nome_arquivo)
+        if usando_sqlite():
+            # Versão e linhas lidas na mesma transação de leitura
+            con = _conectar()
+            try:
+                con.execute("BEGIN")
+                assinatura = _assinatura_atual(nome_arquivo, con)
+                df, total_linhas = _ler_sqlite(nome_arquivo, con=con), None
+                con.execute("COMMIT")
+            finally: con.close()
+        else:
+            # Trava também a leitura para não pegar uma linha anexada pela metade.
+            with trava_arquivo(nome_arquivo):
+                if not os.path.exists(nome_arquivo): _criar_arquivo_vazio(nome_arquivo, colunas)
+                assinatura = _assinatura(caminhos)
+                df, total_linhas = _ler_csv(nome_arquivo, colunas)
+        _cache[chave] = (assinatura, df, total_linhas, {})
+        return df
+
+@perfil.medir("salvar_dados", linhas=lambda _, df, *__: len(df))
+def salvar_dados(df, nome_arquivo):
+    """Reescreve o conjunto de dados inteiro. As exclusões pendentes já estão refletidas em `df`."""
+    with _trava_cache:
+        if usando_sqlite():
+            with _Transacao() as con:
+                ids = _substituir_sqlite(con, df, nome_arquivo)
+                assinatura = _assinatura_atual(nome_arquivo, con)
+            _guardar_no_cache(nome_arquivo, _tipar(df.set_axis(pd.Index(ids))), None, assinatura=assinatura)
+            return
+        with trava_arquivo(nome_arquivo):
+            escrever_atomico(nome_arquivo, lambda temporario: df.to_csv(temporario, index=False))
+            _remover_exclusoes(nome_arquivo)
+            _guardar_no_cache(nome_arquivo, _tipar(df.reset_index(drop=True)), len(df))
+
+@perfil.medir("anexar_dados", linhas=lambda _, df, *__: len(df))
+def anexar_dados(df_novos, nome_arquivo, colunas):
+    """Acrescenta linhas ao final do conjunto de dados sem reescrever o histórico."""
+    df_novos = df_novos.reindex(columns=colunas)
+    with _trava_cache, (contextlib.nullcontext() if usando_sqlite() else trava_arquivo(nome_arquivo)):
+        if usando_sqlite():
+            with _Transacao() as con:
+                entrada = _entrada_valida(nome_arquivo, con)
+                novos_indices = pd.Index(_anexar_sqlite(con, df_novos, nome_arquivo))
+                assinatura = _assinatura_atual(nome_arquivo, con)
+        else:
+            entrada = _entrada_valida(nome_arquivo)
+            _anexar_csv(df_novos, nome_arquivo, colunas)
+            novos_indices = pd.RangeIndex(entrada[1], entrada[1] + len(df_novos)) if entrada else None
+            assinatura = None  # lida por _guardar_no_cache, ainda sob a trava do arquivo
+        if entrada is None:
+            _descartar_do_cache(nome_arquivo)
+            return
+        df, total_linhas, derivados = entrada
+        df_novos = _tipar(df_novos.set_axis(novos_indices))
+        _atualizar_derivados(nome_arquivo, derivados, 1, df_novos)
+        df = df_novos if df.empty else pd.concat([df, df_novos])
+        _guardar_no_cache(nome_arquivo, df, None if total_linhas is None else total_linhas + len(df_novos), derivados, assinatura)
+
+@perfil.medir("excluir_linhas", linhas=lambda _, nome_arquivo, indices, *__: len(indices))
+def excluir_linhas(nome_arquivo, indices, conferir=None, colunas=None):
+    """Exclui linhas pelo índice devolvido por `carregar_dados`.
+
+    Se `conferir` (as linhas como o chamador as leu) for informado, a exclusão
+    só acontece se elas continuarem iguais no disco; caso contrário levanta
+    ValueError, pois o arquivo pode ter sido compactado por outro usuário.
+    """
+    indices = [int(idx) for idx in indices]
+    with _trava_cache, (contextlib.nullcontext() if usando_sqlite() else trava_arquivo(nome_arquivo)):
+        if usando_sqlite():
+            # BEGIN IMMEDIATE impede outros processos de confirmar gravações entre a conferência e o DELETE.
+            with _Transacao() as con:
+                entrada = _entrada_valida(nome_arquivo, con)
+                if conferir is not None:
+                    _conferir(entrada[0] if entrada else _ler_sqlite(nome_arquivo, con=con), indices, conferir)
+                con.executemany(f"DELETE FROM {_tabela(nome_arquivo)[0]} WHERE id = ?", ((idx,) for idx in indices))
+                assinatura = _assinatura_atual(nome_arquivo, con)
+        else:
+            if conferir is not None:
+                _conferir(carregar_dados(nome_arquivo, colunas or list(conferir.columns)), indices, conferir)
+            entrada = _entrada_valida(nome_arquivo)
+            with open(arquivo_exclusoes(nome_arquivo), "a") as f:
+                f.writelines(f"{idx}\n" for idx in indices)
+            assinatura = None
+        if entrada is None:
+            _descartar_do_cache(nome_arquivo)
+            return
+        df, total_linhas, derivados = entrada
+        _atualizar_derivados(nome_arquivo, derivados, 2, df.loc[df.index.intersection(indices)])
+        _guardar_no_cache(nome_arquivo, df.drop(index=indices, errors='ignore'), total_linhas, derivados, assinatura)
+
+def _conferir(atual, indices, conferir):
+    if not (atual.index.isin(indices).sum() == len(indices)
+            and atual.loc[indices].astype(str).equals(conferir.loc[indices].astype(str))):
+        raise ValueError("Os dados mudaram desde a leitura. Recarregue a página e tente novamente.")
+
+@perfil.medir("compactar_dados", linhas=lambda descartadas, *_: descartadas)
+def compactar_dados(nome_arquivo, colunas):
+    """Reescreve o arquivo sem as linhas excluídas. Retorna quantas linhas foram descartadas."""
+    if usando_sqlite():
+        return 0
+    with _trava_cache, trava_arquivo(nome_arquivo):
+        excluidos = ler_exclusoes(nome_arquivo)
+        if not excluidos:
+            return 0
+        salvar_dados(carregar_dados(nome_arquivo, colunas), nome_arquivo)
+        return len(excluidos)
+
+
+# --- Consultas ---
+_OPERADORES = {"=": operator.eq, ">=": operator.ge, "<=": operator.le}
+
+@perfil.medir("consultar_transacoes", linhas=lambda df, *_: len(df))
+def consultar_transacoes(placa=None, data_inicio=None, data_fim=None):
+    """Transações de um veículo e/ou período (datas inclusivas), usando os índices do banco quando houver."""
+    filtros = [("Placa", "=", placa), ("Data", ">=", data_inicio), ("Data", "<=", data_fim)]
+    filtros = [(col, op, valor if isinstance(valor, str) else valor.strftime('%Y-%m-%d')) for col, op, valor in filtros if valor is not None]
+    if usando_sqlite():
+        where = ("WHERE " + " AND ".join(f"{_q(col)} {op} ?" for col, op, _ in filtros)) if filtros else ""
+        return _ler_sqlite(ARQUIVO_TRANSACOES, where, [valor for _, _, valor in filtros])
+    df = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
+    for col, op, valor in filtros:
+        df = df[_OPERADORES[op](df[col], valor)]
+    return df
+
+
+# --- Importação CSV -> SQLite ---
+def importar_csv_para_sqlite():
+    """Copia clientes, veículos e transações dos CSVs para o banco, substituindo o conteúdo das tabelas."""
+    totais = {}
+    with _Transacao() as con:
+        for nome_arquivo, (tabela, colunas) in TABELAS.items():
+            df, _ = _ler_csv(nome_arquivo, colunas)
+            con.execute(f"DELETE FROM {tabela}")
+            _inserir_sqlite(con, tabela, colunas, df, 1)
+            totais[tabela] = len(df)
+    limpar_cache()
+    return totais
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ferramentas de armazenamento do HT Gestão de Locação.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    cmd_importar = sub.add_parser("importar", help="importa os arquivos CSV para o banco SQLite")
+    cmd_importar.add_argument("--banco", default=ARQUIVO_BANCO, help="arquivo do banco SQLite (padrão: %(default)s)")
+    args = parser.parse_args()
+    if args.comando == "importar":
+        ARQUIVO_BANCO = args.banco
+        for tabela, total in importar_csv_para_sqlite().items():
+            print(f"{tabela}: {total} linha(s) importada(s) para {ARQUIVO_BANCO}")
@@ -0,0 +1,465 @@
+"""Medições de desempenho do HT Gestão de Locação.
+
+Uso:
+    python benchmark.py frota [--veiculos 500] [--transacoes 100000] [--orcamento 1.0]
+    python benchmark.py faturas [--quantidade 20] [--lotes 4,16,64] [--processos 4]
+    python benchmark.py estresse [--processos 8] [--iteracoes 25]
+    python benchmark.py partida [--veiculos 50] [--transacoes 10000]
+    python benchmark.py operacoes [--escalas 1000,10000,100000] [--saida resultados.jsonl] [--referencia anterior.jsonl]
+
+Cada comando gera dados sintéticos em memória, mede a operação e termina com
+código 1 se o tempo ultrapassar o orçamento informado.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import subprocess
+import numpy as np
+import pandas as pd
+from armazenamento import colunas_clientes, colunas_veiculos, colunas_transacoes
+
+CATEGORIAS_DESPESA = ["Manutenção", "Impostos", "Seguro", "Combustível", "Outros"]
+
+
+# --- Dados Sintéticos ---
+def gerar_clientes(quantidade, rng):
+    from importacao import formatar_cpf_cnpj
+    return pd.DataFrame({
+        "Nome": [f"Cliente Sintético {i}" for i in range(quantidade)],
+        "CPF/CNPJ": formatar_cpf_cnpj(pd.Series(rng.integers(10**10, 10**11, quantidade)).astype(str)),
+        "Endereço": "Rua Sintética, 1",
+        "Município": rng.choice(["Passos", "Franca", "Ribeirão Preto"], quantidade),
+        "UF": "MG", "CEP": "37902-018", "Telefone": "(35) 99999-0000", "Email": "",
+    }, columns=colunas_clientes)
+
+def gerar_veiculos(quantidade, rng):
+    placas = [f"{''.join(rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), 3))}{i:04d}" for i in range(quantidade)]
+    return pd.DataFrame({
+        "Placa": placas,
+        "Marca": rng.choice(["Fiat", "Volkswagen", "Chevrolet", "Toyota", "Renault"], quantidade),
+        "Modelo": rng.choice(["Uno", "Gol", "Onix", "Corolla", "Kwid"], quantidade),
+        "Ano": rng.integers(2010, 2026, quantidade),
+        "Cor": rng.choice(["Branco", "Preto", "Prata", "Vermelho"], quantidade),
+    }, columns=colunas_veiculos)
+
+def gerar_transacoes(quantidade, placas, rng, data_inicio="2023-01-01", dias=730):
+    """Transações aleatórias; cerca de metade são faturas de aluguel com período de 1 a 30 dias."""
+    datas = pd.Timestamp(data_inicio) + pd.to_timedelta(rng.integers(0, dias, quantidade), unit="D")
+    aluguel = rng.random(quantidade) < 0.5
+    fim_periodo = datas + pd.to_timedelta(rng.integers(0, 30, quantidade), unit="D")
+    descricao = np.where(
+        aluguel,
+        "Fatura Nº " + pd.Series(np.arange(1, quantidade + 1)).astype(str) + " - Cliente: Cliente Sintético - Período: "
+        + datas.strftime('%d/%m/%Y') + " a " + fim_periodo.strftime('%d/%m/%Y'),
+        "Lançamento sintético")
+    return pd.DataFrame({
+        "Placa": rng.choice(np.asarray(placas), quantidade),
+        "Data": datas.strftime('%Y-%m-%d'),
+        "Tipo": np.where(aluguel, "Entrada", "Saída"),
+        "Valor": np.round(rng.uniform(50, 3000, quantidade), 2),
+        "Categoria": np.where(aluguel, "Aluguel", rng.choice(CATEGORIAS_DESPESA, quantidade)),
+        "Descricao": descricao,
+    }, columns=colunas_transacoes)
+
+
+# --- Medição ---
+def cronometrar(funcao, repeticoes=5):
+    """Menor tempo (s) entre `repeticoes` execuções de `funcao`."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def relatar(nome, segundos, orcamento=None):
+    situacao = "" if orcamento is None else (" OK" if segundos <= orcamento else f" ACIMA DO ORÇAMENTO ({orcamento:.3f} s)")
+    print(f"{nome:<45} {segundos * 1000:10.1f} ms{situacao}")
+    return orcamento is None or segundos <= orcamento
+
+
+# --- Comandos ---
+def medir_frota(args):
+    from analise import analisar_frota
+    rng = np.random.default_rng(args.semente)
+    df_veiculos = gerar_veiculos(args.veiculos, rng)
+    df_transacoes = gerar_transacoes(args.transacoes, df_veiculos["Placa"], rng)
+    segundos = cronometrar(lambda: analisar_frota(df_transacoes, df_veiculos, "2023-01-01", "2024-12-31"), args.repeticoes)
+    return relatar(f"analisar_frota ({args.veiculos} veículos x {args.transacoes} transações)", segundos, args.orcamento)
+
+def _dados_fatura(numero):
+    import datetime
+    hoje = datetime.date.today()
+    cliente = {"Nome": f"Cliente {numero}", "Endereço": "Rua Sintética, 1", "Município": "Passos", "UF": "MG", "CEP": "37902-018", "CPF/CNPJ": "123.456.789-09"}
+    return {"num_fatura": numero, "data_emissao": hoje, "data_vencimento": hoje, "cliente": cliente, "placa": "ABC1234",
+            "contrato": "1/12", "inicio": hoje, "fim": hoje, "descricao_item": "Diária", "valor_str": "2.400,00", "valor_extenso": "Dois mil e quatrocentos reais"}
+
+def medir_faturas(args):
+    """Faturas por segundo sem cache (como antes), com o modelo pré-montado e com o PDF em cache."""
+    import faturas
+    lista_dados = [_dados_fatura(i) for i in range(1, args.quantidade + 1)]
+
+    def sem_cache():
+        for dados in lista_dados:
+            faturas.limpar_caches_fatura()
+            faturas.gerar_pdf_fatura(dados)
+
+    def modelo_em_cache():
+        faturas.limpar_caches_fatura(modelo=False)
+        for dados in lista_dados: faturas.gerar_pdf_fatura(dados)
+
+    def pdf_em_cache():
+        for dados in lista_dados: faturas.gerar_pdf_fatura(dados)
+
+    faturas.gerar_pdf_fatura(lista_dados[0])  # importa o xhtml2pdf fora da medição
+    for nome, funcao in [("sem cache", sem_cache), ("modelo pré-montado", modelo_em_cache), ("PDF em cache (novo download)", pdf_em_cache)]:
+        segundos = cronometrar(funcao, args.repeticoes)
+        print(f"{'faturas: ' + nome:<45} {args.quantidade / segundos:10.1f} faturas/s")
+    if args.lotes: _medir_lotes(faturas, args.lotes, args.processos)
+    return True
+
+def _medir_lotes(faturas, tamanhos, processos):
+    """Lote em série x pool novo x pool reaproveitado, para achar MINIMO_PARA_PARALELIZAR e MINIMO_COM_POOL_PRONTO."""
+    processos = processos or os.cpu_count() or 1
+    print(f"lotes com {processos} processo(s) no pool (automático: pool a partir de {faturas.MINIMO_PARA_PARALELIZAR}, "
+          f"ou {faturas.MINIMO_COM_POOL_PRONTO} com o pool pronto):")
+    print(f"  {'faturas':>8} {'série':>10} {'pool novo':>10} {'reaprov.':>10}")
+    for tamanho in tamanhos:
+        # Números diferentes a cada medição para o cache de PDFs não valer
+        tempos = []
+        for rodada, (paralelo, novo) in enumerate([(False, False), (True, True), (True, False)]):
+            if novo: faturas.encerrar_pool()
+            dados = [_dados_fatura(tamanho * 1000 + rodada * tamanho + i) for i in range(tamanho)]
+            t0 = time.perf_counter()
+            faturas.renderizar_lote(dados, processos, paralelo=paralelo)
+            tempos.append(time.perf_counter() - t0)
+        print(f"  {tamanho:>8} " + " ".join(f"{segundos * 1000:>8.0f}ms" for segundos in tempos))
+    faturas.encerrar_pool()
+
+def _escritor_estresse(diretorio, ident, iteracoes, prontos, conferir):
+    """Processo de teste: emite faturas e grava/exclui lançamentos concorrendo com os demais.
+
+    No fim espera o sinal `conferir` (dado quando todos pararam de gravar) e
+    compara o que tem em cache (DataFrame, resumo e índice de busca, mantidos
+    no lugar a cada gravação) com uma releitura do disco; sai com código 2 se
+    forem diferentes.
+    """
+    os.chdir(diretorio)
+    import armazenamento as arm
+    import busca
+    import faturas
+    import resumo
+    placa = f"EST{ident:04d}"
+    try:
+        arm.anexar_dados(pd.DataFrame([{"Placa": placa, "Marca": "Estresse", "Modelo": str(ident)}]), arm.ARQUIVO_VEICULOS, arm.colunas_veiculos)
+        for i in range(iteracoes):
+            numero = faturas.reservar_numeros_fatura(1)
+            temporaria = f"temporario {ident}-{i}"
+            arm.anexar_dados(pd.DataFrame([
+                {"Placa": placa, "Data": "2025-01-01", "Tipo": "Entrada", "Valor": 1.0, "Categoria": "Aluguel", "Descricao": f"Fatura Nº {numero}"},
+                {"Placa": placa, "Data": "2025-01-01", "Tipo": "Saída", "Valor": 1.0, "Categoria": "Outros", "Descricao": temporaria},
+            ]), arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+            while True:
+                df = arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+                alvo = df[df["Descricao"] == temporaria]
+                try:
+                    arm.excluir_linhas(arm.ARQUIVO_TRANSACOES, alvo.index, conferir=alvo)
+                    break
+                except ValueError:
+                    continue
+            resumo.resumo_veiculo(placa)
+            busca.chaves_cadastradas(arm.ARQUIVO_VEICULOS)
+    finally:
+        prontos.put(ident)
+    conferir.wait()
+
+    def estado():
+        valores = resumo.resumo_veiculo(placa)
+        return {"transações": arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes),
+                "veículos": arm.carregar_dados(arm.ARQUIVO_VEICULOS, arm.colunas_veiculos),
+                **{f"resumo ({chave})": valor for chave, valor in valores.items()},
+                "índice de busca": busca.chaves_cadastradas(arm.ARQUIVO_VEICULOS)}
+    em_cache = estado()
+    arm.limpar_cache()
+    relido = estado()
+    divergencias = [nome for nome, valor in em_cache.items()
+                    if not (valor.equals(relido[nome]) if hasattr(valor, "equals") else valor == relido[nome])]
+    if divergencias:
+        print(f"  processo {ident}: cache diferente do disco em {', '.join(divergencias)}", file=sys.stderr)
+        sys.exit(2)
+
+def _compactador_estresse(diretorio, parar):
+    os.chdir(diretorio)
+    import armazenamento as arm
+    while not parar.is_set():
+        arm.compactar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+        time.sleep(0.01)
+
+def medir_estresse(args):
+    """N processos gravando ao mesmo tempo (e um compactando): nenhum número repetido, nenhuma linha perdida
+    e, em cada processo, o cache igual a uma releitura do disco."""
+    import tempfile
+    import multiprocessing
+    import armazenamento as arm
+    contexto = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as diretorio:
+        anterior = os.getcwd()
+        os.chdir(diretorio)
+        try:
+            inicio = time.perf_counter()
+            parar, conferir, prontos = contexto.Event(), contexto.Event(), contexto.Queue()
+            compactador = contexto.Process(target=_compactador_estresse, args=(diretorio, parar))
+            compactador.start()
+            escritores = [contexto.Process(target=_escritor_estresse, args=(diretorio, i, args.iteracoes, prontos, conferir))
+                          for i in range(args.processos)]
+            for processo in escritores: processo.start()
+            for _ in escritores: prontos.get()
+            parar.set(); compactador.join()
+            segundos = time.perf_counter() - inicio
+            conferir.set()
+            for processo in escritores: processo.join()
+
+            arm.limpar_cache()
+            df = arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+            esperado = args.processos * args.iteracoes
+            numeros = df["Descricao"].str.extract(r"Fatura Nº (\d+)")[0].dropna().astype(int)
+            with open(arm.ARQUIVO_FATURAS) as f: ultimo = int(f.read())
+            falhas = []
+            divergentes = sum(processo.exitcode == 2 for processo in escritores)
+            if divergentes: falhas.append(f"cache diferente do disco em {divergentes} processo(s)")
+            if any(processo.exitcode not in (0, 2) for processo in escritores) or compactador.exitcode != 0:
+                falhas.append("processo terminou com erro")
+            if len(numeros) != esperado: falhas.append(f"{len(numeros)} faturas gravadas, esperadas {esperado}")
+            if numeros.duplicated().any(): falhas.append(f"{numeros.duplicated().sum()} número(s) de fatura repetido(s)")
+            if ultimo != esperado: falhas.append(f"contador em {ultimo}, esperado {esperado}")
+            restantes = df["Descricao"].str.startswith("temporario").sum()
+            if restantes: falhas.append(f"{restantes} lançamento(s) excluído(s) reapareceram")
+        finally:
+            os.chdir(anterior)
+    relatar(f"estresse ({args.processos} processos x {args.iteracoes} faturas)", segundos)
+    for falha in falhas: print(f"  FALHA: {falha}")
+    return not falhas
+
+def _operacoes_de_dados(df_clientes, df_veiculos, df_transacoes, arquivo_importacao, arquivo_excel=None):
+    """(nome, função) de cada operação medida por `operacoes`, na ordem em que rodam."""
+    import armazenamento as arm
+    import busca
+    import resumo
+    import importacao
+    from analise import analisar_frota
+    placa = df_veiculos["Placa"].iloc[0]
+
+    def sem_cache():
+        arm.limpar_cache()
+        arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+
+    def excluir_e_compactar():
+        df = arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+        arm.excluir_linhas(arm.ARQUIVO_TRANSACOES, df.index[-1:])
+        arm.compactar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)
+
+    def buscar_indice_novo():
+        arm.descartar_derivado(arm.ARQUIVO_CLIENTES, "busca")
+        busca.buscar(arm.ARQUIVO_CLIENTES, "cliente sint 1")
+
+    def importar_excel():
+        # Ida e volta por uma planilha com datas de verdade (células de data, não texto)
+        gravadas, rejeitadas = importacao.importar(arquivo_excel, "transacoes")
+        if len(rejeitadas):
+            raise RuntimeError(f"Excel: {len(rejeitadas)} linha(s) rejeitada(s): {rejeitadas['Motivo'].value_counts().to_dict()}")
+
+    def resumo_reconstruido():
+        resumo.reconstruir_resumo()
+        resumo.resumo_veiculo(placa)
+
+    return [
+        ("salvar_dados (transações)", lambda: arm.salvar_dados(df_transacoes, arm.ARQUIVO_TRANSACOES)),
+        ("carregar_dados sem cache", sem_cache),
+        ("carregar_dados com cache", lambda: arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)),
+        ("anexar_dados (1 linha)", lambda: arm.anexar_dados(df_transacoes.iloc[:1], arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes)),
+        ("excluir_linhas + compactar_dados", excluir_e_compactar),
+        ("consultar_transacoes (1 placa)", lambda: arm.consultar_transacoes(placa=placa)),
+        ("resumo_veiculo (reconstruído)", resumo_reconstruido),
+        ("resumo_veiculo", lambda: resumo.resumo_veiculo(placa)),
+        ("analisar_frota (2 anos)", lambda: analisar_frota(arm.carregar_dados(arm.ARQUIVO_TRANSACOES, arm.colunas_transacoes), df_veiculos, "2023-01-01", "2024-12-31")),
+        ("buscar cliente (índice novo)", buscar_indice_novo),
+        ("buscar cliente", lambda: busca.buscar(arm.ARQUIVO_CLIENTES, "cliente sint 1")),
+        ("importar transações (CSV)", lambda: importacao.importar(arquivo_importacao, "transacoes")),
+    ] + ([("importar transações (Excel)", importar_excel)] if arquivo_excel else [])
+
+def medir_operacoes(args):
+    """Tempo de cada operação de dados sobre bases sintéticas de vários tamanhos (backend de LOCAUTO_BACKEND)."""
+    import tempfile
+    import armazenamento as arm
+    momento = time.strftime("%Y-%m-%dT%H:%M:%S")
+    resultados = []
+    for escala in args.escalas:
+        rng = np.random.default_rng(args.semente)
+        df_veiculos = gerar_veiculos(max(10, escala // 200), rng)
+        df_clientes = gerar_clientes(max(10, escala // 100), rng)
+        df_transacoes = gerar_transacoes(escala, df_veiculos["Placa"], rng)
+        print(f"{escala} transações, {len(df_veiculos)} veículos, {len(df_clientes)} clientes ({arm.BACKEND}):")
+        with tempfile.TemporaryDirectory() as diretorio:
+            anterior = os.getcwd()
+            os.chdir(diretorio)
+            try:
+                arm.limpar_cache()
+                arm.salvar_dados(df_clientes, arm.ARQUIVO_CLIENTES)
+                arm.salvar_dados(df_veiculos, arm.ARQUIVO_VEICULOS)
+                amostra = df_transacoes.iloc[:max(1, escala // 10)]
+                amostra.to_csv("importacao.csv", index=False)
+                arquivo_excel = None
+                if importlib.util.find_spec("openpyxl"):
+                    arquivo_excel = "importacao.xlsx"
+                    amostra.assign(Data=pd.to_datetime(amostra["Data"])).iloc[:1000].to_excel(arquivo_excel, index=False)
+                for nome, funcao in _operacoes_de_dados(df_clientes, df_veiculos, df_transacoes, "importacao.csv", arquivo_excel):
+                    segundos = cronometrar(funcao, args.repeticoes)
+                    relatar(f"  {nome}", segundos)
+                    resultados.append({"momento": momento, "backend": arm.BACKEND, "escala": escala, "operacao": nome, "ms": round(segundos * 1000, 3)})
+            finally:
+                os.chdir(anterior)
+                arm.limpar_cache()
+    if args.saida:
+        with open(args.saida, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(resultado, ensure_ascii=False) + "\n" for resultado in resultados)
+    return _comparar_com_referencia(resultados, args.referencia, args.tolerancia) if args.referencia else True
+
+MINIMO_COMPARAVEL_MS = 1.0  # abaixo disso a variação entre execuções é maior que a diferença medida
+
+def _comparar_com_referencia(resultados, arquivo, tolerancia):
+    """Compara com a última medição de mesma operação, escala e backend em `arquivo` (JSONL de --saida)."""
+    referencia = {}
+    with open(arquivo, encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                anterior = json.loads(linha)
+                referencia[(anterior["backend"], anterior["escala"], anterior["operacao"])] = anterior["ms"]
+    regressoes = 0
+    print(f"Comparação com {arquivo} (tolerância {tolerancia:.1f}x):")
+    for resultado in resultados:
+        antes = referencia.get((resultado["backend"], resultado["escala"], resultado["operacao"]))
+        if not antes or max(antes, resultado["ms"]) < MINIMO_COMPARAVEL_MS: continue
+        razao = resultado["ms"] / antes
+        if razao > tolerancia:
+            regressoes += 1
+            print(f"  REGRESSÃO {resultado['operacao']} ({resultado['escala']}): {antes:.1f} ms -> {resultado['ms']:.1f} ms ({razao:.1f}x)")
+    print(f"  {regressoes} regressão(ões) encontrada(s).")
+    return regressoes == 0
+
+# Cada medição de partida roda num interpretador novo, para que nenhum módulo
+# já carregado por este processo mascare o custo de importação.
+MODULOS_PESADOS = ["pandas", "streamlit", "matplotlib.pyplot", "altair", "xhtml2pdf.pisa"]
+MODULOS_APLICACAO = ["armazenamento", "faturas", "resumo", "analise", "tabelas", "busca", "importacao", "graficos"]
+
+# No Linux o ru_maxrss passa do processo pai para o filho; VmHWM é do processo novo.
+CODIGO_MEMORIA = """
+import resource
+def memoria_kb():
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(linha.split()[1]) for linha in f if linha.startswith("VmHWM"))
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+"""
+
+CODIGO_IMPORTACAO = CODIGO_MEMORIA + """
+import sys, time
+inicio = time.perf_counter()
+for modulo in sys.argv[1].split(","): __import__(modulo)
+print(time.perf_counter() - inicio, memoria_kb())
+"""
+
+CODIGO_RENDERIZACAO = CODIGO_MEMORIA + """
+import sys, json, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.run()
+tempos = {"primeira execução (Gerar Fatura)": time.perf_counter() - inicio}
+for pagina in app.sidebar.radio[0].options[1:]:
+    inicio = time.perf_counter()
+    app.sidebar.radio[0].set_value(pagina).run()
+    tempos[pagina] = time.perf_counter() - inicio
+    if pagina == "Gestão de Frotas":
+        inicio = time.perf_counter()
+        app.selectbox(key="gestao_veiculo").set_value(0).run()
+        tempos["Gestão de Frotas (veículo com gráficos)"] = time.perf_counter() - inicio
+pesados = [modulo for modulo in sys.argv[2].split(",") if modulo in sys.modules]
+print(json.dumps({"tempos": tempos, "memoria_kb": memoria_kb(),
+                  "pesados": pesados, "erro": str(app.exception) if app.exception else None}))
+"""
+
+def _interpretador_novo(codigo, *argumentos, diretorio=None):
+    resultado = subprocess.run([sys.executable, "-c", codigo, *argumentos], capture_output=True, text=True,
+                               cwd=diretorio, env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__))))
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    return resultado.stdout.strip().splitlines()[-1]
+
+def medir_partida(args):
+    """Importação dos módulos e primeira renderização de cada página num processo novo."""
+    import tempfile
+    from armazenamento import ARQUIVO_CLIENTES, ARQUIVO_VEICULOS, ARQUIVO_TRANSACOES, colunas_clientes
+    print("Importação em processo novo (menor de", args.repeticoes, "execuções):")
+    for modulos in MODULOS_PESADOS + [",".join(MODULOS_APLICACAO)]:
+        medicoes = []
+        for _ in range(args.repeticoes):
+            try: medicoes.append(tuple(map(float, _interpretador_novo(CODIGO_IMPORTACAO, modulos).split())))
+            except RuntimeError as erro:
+                medicoes = None; print(f"  {modulos:<43} não instalado ({erro})"); break
+        if medicoes:
+            segundos, memoria = min(medicoes)
+            nome = "módulos da aplicação" if modulos.startswith("armazenamento") else modulos
+            print(f"  {nome:<43} {segundos * 1000:10.1f} ms {memoria / 1024:8.1f} MB")
+
+    rng = np.random.default_rng(args.semente)
+    with tempfile.TemporaryDirectory() as diretorio:
+        df_veiculos = gerar_veiculos(args.veiculos, rng)
+        df_veiculos.to_csv(os.path.join(diretorio, ARQUIVO_VEICULOS), index=False)
+        gerar_transacoes(args.transacoes, df_veiculos["Placa"], rng).to_csv(os.path.join(diretorio, ARQUIVO_TRANSACOES), index=False)
+        pd.DataFrame([[f"Cliente {i}", "", "", "", "", "", "", ""] for i in range(args.veiculos)], columns=colunas_clientes).to_csv(os.path.join(diretorio, ARQUIVO_CLIENTES), index=False)
+        app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locauto.py")
+        resultado = json.loads(_interpretador_novo(CODIGO_RENDERIZACAO, app, ",".join(MODULOS_PESADOS), diretorio=diretorio))
+    print(f"Primeira renderização ({args.veiculos} veículos x {args.transacoes} transações):")
+    for pagina, segundos in resultado["tempos"].items():
+        relatar(f"  {pagina}", segundos)
+    print(f"  {'memória máxima do processo':<43} {resultado['memoria_kb'] / 1024:10.1f} MB")
+    print(f"  {'módulos pesados carregados':<43} {', '.join(resultado['pesados']) or 'nenhum'}")
+    if resultado["erro"]: print(f"  FALHA: {resultado['erro']}")
+    return not resultado["erro"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Medições de desempenho do HT Gestão de Locação.")
+    parser.add_argument("--semente", type=int, default=42, help="semente dos dados sintéticos")
+    parser.add_argument("--repeticoes", type=int, default=5, help="execuções por medição (vale a menor)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    cmd_frota = sub.add_parser("frota", help="análise de todos os veículos de uma vez")
+    cmd_frota.add_argument("--veiculos", type=int, default=500)
+    cmd_frota.add_argument("--transacoes", type=int, default=100_000)
+    cmd_frota.add_argument("--orcamento", type=float, default=1.0, help="tempo máximo aceito em segundos")
+    cmd_frota.set_defaults(funcao=medir_frota)
+    cmd_faturas = sub.add_parser("faturas", help="montagem e renderização de faturas em PDF")
+    cmd_faturas.add_argument("--quantidade", type=int, default=20, help="faturas por medição")
+    cmd_faturas.add_argument("--lotes", type=lambda texto: [int(tamanho) for tamanho in texto.split(",")], default=[],
+                             help="tamanhos de lote a comparar em série e no pool, separados por vírgula (ex.: 4,16,64)")
+    cmd_faturas.add_argument("--processos", type=int, default=None, help="processos do pool nos lotes (padrão: CPUs)")
+    cmd_faturas.set_defaults(funcao=medir_faturas)
+    cmd_estresse = sub.add_parser("estresse", help="escritores concorrentes em processos separados")
+    cmd_estresse.add_argument("--processos", type=int, default=8)
+    cmd_estresse.add_argument("--iteracoes", type=int, default=25, help="faturas emitidas por processo")
+    cmd_estresse.set_defaults(funcao=medir_estresse)
+    cmd_partida = sub.add_parser("partida", help="tempo de importação, memória e primeira renderização das páginas")
+    cmd_partida.add_argument("--veiculos", type=int, default=50)
+    cmd_partida.add_argument("--transacoes", type=int, default=10_000)
+    cmd_partida.set_defaults(funcao=medir_partida)
+    cmd_operacoes = sub.add_parser("operacoes", help="operações de dados sobre bases sintéticas de vários tamanhos")
+    cmd_operacoes.add_argument("--escalas", type=lambda texto: [int(escala) for escala in texto.split(",")], default=[1_000, 10_000, 100_000], help="quantidades de transações, separadas por vírgula")
+    cmd_operacoes.add_argument("--saida", help="acrescenta os resultados a este arquivo JSONL")
+    cmd_operacoes.add_argument("--referencia", help="JSONL de uma execução anterior; termina com erro se algo ficar mais lento")
+    cmd_operacoes.add_argument("--tolerancia", type=float, default=1.5, help="quantas vezes mais lento ainda é aceito")
+    cmd_operacoes.set_defaults(funcao=medir_operacoes)
+    args = parser.parse_args()
+    sys.exit(0 if args.funcao(args) else 1)
@@ -0,0 +1,145 @@
+import re
+import heapq
+import bisect
+import difflib
+import unicodedata
+import perfil
+import armazenamento
+from armazenamento import ARQUIVO_CLIENTES, ARQUIVO_VEICULOS, colunas_clientes, colunas_veiculos
+
+# --- Índice de Busca de Clientes e Veículos ---
+# Para cada conjunto guarda a chave normalizada (dígitos do CPF/CNPJ, placa sem
+# pontuação), o vocabulário ordenado das palavras pesquisáveis (para busca por
+# prefixo com bisect e aproximada com difflib) e o rótulo de cada linha. É uma
+# estrutura derivada do armazenamento: construída na primeira busca e
+# atualizada no lugar a cada inclusão ou exclusão feita por este processo, no
+# CSV e no SQLite (cuja assinatura é a versão da própria tabela, de modo que
+# gravar transações não afeta os índices). Gravações de outros processos
+# fazem o índice ser reconstruído na próxima busca.
+LIMITE_RESULTADOS = 20
+SIMILARIDADE_MINIMA = 0.75
+
+# nome_arquivo: (colunas, coluna da chave, colunas pesquisáveis, rótulo da linha)
+INDICES = {
+    ARQUIVO_CLIENTES: (colunas_clientes, "CPF/CNPJ", ("Nome", "CPF/CNPJ", "Município"),
+                       lambda linha: f"{linha['Nome']} — {linha['CPF/CNPJ'] or 'sem CPF/CNPJ'}"),
+    ARQUIVO_VEICULOS: (colunas_veiculos, "Placa", ("Placa", "Marca", "Modelo"),
+                       lambda linha: f"{linha['Placa']} ({linha['Marca']} {linha['Modelo']})"),
+}
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e só com letras e números separados por espaço."""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode().lower()
+    return re.sub(r"[^a-z0-9]+", " ", texto).strip()
+
+def normalizar_chave(valor):
+    """Chave de identificação: CPF/CNPJ só com dígitos, placa sem pontuação e em maiúsculas."""
+    return re.sub(r"[^0-9A-Za-z]", "", str(valor)).upper()
+
+def _palavras(linha, chave, colunas_texto):
+    """Palavras pesquisáveis da linha; a chave entra também sem pontuação (ex.: "12345678909")."""
+    palavras = {chave.lower()} if chave else set()
+    for col in colunas_texto:
+        palavras.update(normalizar(linha[col]).split())
+    return palavras
+
+def _construtores(nome_arquivo):
+    _, coluna_chave, colunas_texto, rotular = INDICES[nome_arquivo]
+    usadas = list(dict.fromkeys(("Nome", "Placa", "Marca", "Modelo", coluna_chave) + colunas_texto))
+
+    def incluir(indice, df_novos):
+        textos = df_novos.reindex(columns=usadas).astype(object).fillna("")
+        for idx, linha in zip(df_novos.index, textos.to_dict("records")):
+            idx = int(idx)
+            chave = normalizar_chave(linha[coluna_chave])
+            if chave: indice["chaves"].setdefault(chave, set()).add(idx)
+            palavras = _palavras(linha, chave, colunas_texto)
+            for palavra in palavras:
+                if palavra not in indice["palavras"]:
+                    indice["palavras"][palavra] = set()
+                    bisect.insort(indice["vocabulario"], palavra)
+                indice["palavras"][palavra].add(idx)
+            indice["linhas"][idx] = (rotular(linha), chave, palavras)
+
+    def excluir(indice, df_removidos):
+        for idx in df_removidos.index:
+            rotulo, chave, palavras = indice["linhas"].pop(int(idx), (None, None, ()))
+            if chave: _descartar(indice["chaves"], chave, int(idx))
+            for palavra in palavras:
+                if _descartar(indice["palavras"], palavra, int(idx)):
+                    del indice["vocabulario"][bisect.bisect_left(indice["vocabulario"], palavra)]
+
+    def construir(df):
+        indice = {"chaves": {}, "palavras": {}, "vocabulario": [], "linhas": {}}
+        incluir(indice, df)
+        return indice
+
+    return construir, incluir, excluir
+
+def _descartar(mapa, chave, idx):
+    """Remove `idx` de mapa[chave]; retorna True se a chave ficou vazia e foi apagada."""
+    ids = mapa.get(chave)
+    if ids is None: return False
+    ids.discard(idx)
+    if ids: return False
+    del mapa[chave]
+    return True
+
+for _nome_arquivo in INDICES:
+    armazenamento.registrar_derivado(_nome_arquivo, "busca", *_construtores(_nome_arquivo))
+
+
+# --- Consultas ---
+def _pontuar(indice, texto):
+    """{id: pontuação} das linhas que combinam com o texto buscado."""
+    pontos = {}
+    chave = normalizar_chave(texto)
+    for idx in indice["chaves"].get(chave, ()):
+        pontos[idx] = pontos.get(idx, 0) + 10
+    vocabulario = indice["vocabulario"]
+    for termo in normalizar(texto).split():
+        achados = {}
+        posicao = bisect.bisect_left(vocabulario, termo)
+        while posicao < len(vocabulario) and vocabulario[posicao].startswith(termo):
+            palavra = vocabulario[posicao]
+            for idx in indice["palavras"][palavra]:
+                achados[idx] = max(achados.get(idx, 0), 3 if palavra == termo else 2)
+            posicao += 1
+        if not achados:
+            for palavra in difflib.get_close_matches(termo, vocabulario, n=5, cutoff=SIMILARIDADE_MINIMA):
+                similaridade = difflib.SequenceMatcher(None, termo, palavra).ratio()
+                for idx in indice["palavras"][palavra]:
+                    achados[idx] = max(achados.get(idx, 0), similaridade)
+        for idx, valor in achados.items():
+            pontos[idx] = pontos.get(idx, 0) + valor
+    return pontos
+
+@perfil.medir("buscar", linhas=lambda resultados, *_: len(resultados))
+def buscar(nome_arquivo, texto="", limite=LIMITE_RESULTADOS):
+    """Até `limite` pares (id da linha, rótulo) mais parecidos com `texto`.
+
+    Sem texto, retorna os primeiros registros em ordem alfabética. O id é o
+    índice do DataFrame de `carregar_dados`.
+    """
+    colunas = INDICES[nome_arquivo][0]
+
+    def consulta(indice):
+        linhas = indice["linhas"]
+        if not normalizar(texto) and not normalizar_chave(texto):
+            return heapq.nsmallest(limite, ((idx, rotulo) for idx, (rotulo, _, _) in linhas.items()), key=lambda item: item[1].lower())
+        melhores = heapq.nsmallest(limite, _pontuar(indice, texto).items(), key=lambda item: (-item[1], linhas[item[0]][0].lower()))
+        return [(idx, linhas[idx][0]) for idx, _ in melhores]
+
+    return armazenamento.consultar_derivado(nome_arquivo, colunas, "busca", consulta)
+
+def ids_por_chave(nome_arquivo, valor):
+    """Ids das linhas cuja chave (CPF/CNPJ ou placa) normalizada é igual à de `valor`."""
+    chave = normalizar_chave(valor)
+    return armazenamento.consultar_derivado(
+        nome_arquivo, INDICES[nome_arquivo][0], "busca", lambda indice: sorted(indice["chaves"].get(chave, ())))
+
+def chaves_cadastradas(nome_arquivo):
+    """Conjunto das chaves normalizadas já cadastradas (para detectar duplicatas)."""
+    return armazenamento.consultar_derivado(
+        nome_arquivo, INDICES[nome_arquivo][0], "busca", lambda indice: set(indice["chaves"]))
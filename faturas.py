@@ -0,0 +1,269 @@
+import os
+import base64
+import hashlib
+import zipfile
+import threading
+import multiprocessing
+from io import BytesIO
+from string import Template
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+import perfil
+from armazenamento import ARQUIVO_FATURAS, ARQUIVO_TRANSACOES, colunas_transacoes, anexar_dados, trava_arquivo, escrever_atomico
+from analise import descricao_fatura, converter_datas
+
+# --- Numeração das Faturas ---
+# O contador é lido e gravado com o arquivo travado (também entre processos),
+# então duas sessões nunca recebem o mesmo número.
+def ler_ultimo_numero_fatura():
+    try:
+        with open(ARQUIVO_FATURAS, "r") as f: return int(f.read().strip())
+    except (FileNotFoundError, ValueError): return 0
+
+def salvar_numero_fatura(numero_usado):
+    def escrever(temporario):
+        with open(temporario, "w") as f: f.write(str(numero_usado))
+    escrever_atomico(ARQUIVO_FATURAS, escrever)
+
+def reservar_numeros_fatura(quantidade):
+    """Reserva `quantidade` números consecutivos e retorna o primeiro deles."""
+    with trava_arquivo(ARQUIVO_FATURAS):
+        primeiro = ler_ultimo_numero_fatura() + 1
+        salvar_numero_fatura(primeiro + quantidade - 1)
+        return primeiro
+
+def registrar_numero_fatura(numero_usado):
+    """Avança o contador se um número maior que o último foi usado manualmente."""
+    with trava_arquivo(ARQUIVO_FATURAS):
+        if numero_usado > ler_ultimo_numero_fatura():
+            salvar_numero_fatura(numero_usado)
+
+
+# --- Montagem e Conversão ---
+def formatar_valor(valor):
+    """Formata um número no padrão brasileiro (2.400,00)."""
+    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def converter_valor(valor_str):
+    """Converte "2.400,00" (ou 2400.0) em float."""
+    if isinstance(valor_str, (int, float)): return float(valor_str)
+    valor_str = str(valor_str).strip()
+    if "," in valor_str: valor_str = valor_str.replace(".", "").replace(",", ".")
+    return float(valor_str)
+
+# --- Modelo da Fatura ---
+# As partes fixas (estilo, cabeçalho da empresa e logo em base64) entram no
+# modelo uma única vez por processo; a cada fatura só os campos variáveis são
+# substituídos. Os PDFs gerados ficam em um cache LRU indexado pelo hash do
+# HTML, de modo que pré-visualizações e novos downloads da mesma fatura não
+# passam de novo pelo xhtml2pdf.
+ESTILO_FATURA = "body { font-family: Arial, sans-serif; font-size: 12px; color: #000; } .container { max-width: 800px; margin: auto; padding: 40px; } .header { display: flex; justify-content: space-between; align-items: flex-start; border-bottom: 2px solid #000; padding-bottom: 10px;} .logo-empresa-container { flex: 2; display: flex; align-items: center; } .logo { max-height: 70px; width: auto; margin-right: 15px; } .empresa-info p { margin: 3px 0; } .fatura-box { flex: 1; border: 1px solid #000; padding: 5px; text-align: center; } .fatura-box h2 { margin: 0; font-size: 14px; } .fatura-box p { margin: 2px 0; } .sacado-box { border: 1px solid #000; padding: 10px; margin-top: 10px; } .sacado-box p { margin: 3px 0; } .vencimento-box { border: 1px solid #000; padding: 5px; margin-top: 10px; display: flex; justify-content: space-between; } .vencimento-box div { width: 50%; } .extenso-box { border: 1px solid #000; padding: 5px; margin-top: 10px; } .descricao-table { width: 100%; border-collapse: collapse; margin-top: 10px; } .descricao-table th, .descricao-table td { border: 1px solid #000; padding: 5px; } .descricao-table th { text-align: center; } .descricao-table .valor-col { text-align: right; width: 120px; } .descricao-table .total-label { text-align: right; font-weight: bold; border-left: none; border-bottom: none;} .footer { text-align: center; margin-top: 15px; font-size: 10px; } strong { font-weight: bold; } @media print { @page { size: A4; margin: 20mm; } body { margin: 0; padding: 0; } .container { border: none; box-shadow: none; width: 100%; max-width: 100%; margin: 0; padding: 0; } }"
+TAMANHO_CACHE_PDF = 64
+
+# Campos variáveis no formato de string.Template ("$$" é um cifrão literal);
+# {estilo} e {logo_html_tag} são preenchidos uma vez em `_modelo_fatura`.
+MODELO_FATURA = """    <!DOCTYPE html><html lang="pt-BR"><head><meta name="viewport" content="width=device-width, initial-scale=1.0"><meta charset="UTF-8"><title>Fatura de Locação N° $num_fatura</title>
+    <style>{estilo}</style></head>
+    <body><div class="container">
+        <div class="header"><div class="logo-empresa-container">{logo_html_tag}<div class="empresa-info"><strong>HT Locações Auto LTDA</strong><p>Rua dos boiadeiros, 566 - PASSOS/MG CEP 37902-018</p><p>CNPJ: 05.261.064/0001-60</p><p>FONE: (35)999817121</p></div></div><div class="fatura-box"><h2>FATURA DE LOCAÇÃO</h2><p><strong>N°:</strong> $num_fatura</p><p><strong>Data da Emissão:</strong> $data_emissao</p></div></div>
+        <div class="sacado-box"><p><strong>Cliente:</strong> $cliente_nome</p><p><strong>Endereço:</strong> $cliente_endereco</p><p><strong>Município:</strong> $cliente_municipio <strong>UF:</strong> $cliente_uf <strong>CEP:</strong> $cliente_cep</p><p><strong>CNPJ(MF)/CPF:</strong> $cliente_documento</p></div>
+        <div class="vencimento-box"><div><strong>Fatura/Duplicata Valor R$$:</strong> $valor_str</div><div><strong>Vencimento(s):</strong> $data_vencimento</div></div>
+        <div class="extenso-box"><strong>Valor por Extenso:</strong> $valor_extenso</div>
+        <table class="descricao-table"><thead><tr><th>Descrição</th><th>Valor R$$</th></tr></thead><tbody>
+        <tr><td>Contrato: $contrato Período: $inicio a $fim<br>Placa Atual: $placa<br>Itens/Despesas e Serviços Adicionais:<br>$descricao_item - R$$ $valor_str</td><td class="valor-col">$valor_str</td></tr>
+        <tr><td class="total-label">Total da Fatura</td><td class="valor-col"><strong>R$$ $valor_str</strong></td></tr>
+        </tbody></table><div class="footer"><p>Atividade não sujeita ao ISSQN e à emissão de NF conforme Lei 116/03 - Item 3.01</p></div>
+    </div></body></html>
+"""
+
+def _logo_html():
+    try:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png"), "rb") as f:
+            logo_base64 = base64.b64encode(f.read()).decode("utf-8")
+        return f'<img src="data:image/png;base64,{logo_base64}" class="logo">'
+    except FileNotFoundError:
+        return ""
+
+@lru_cache(maxsize=1)
+def _modelo_fatura():
+    return Template(MODELO_FATURA.replace("{estilo}", ESTILO_FATURA).replace("{logo_html_tag}", _logo_html()))
+
+def montar_html_fatura(dados):
+    """Monta o HTML da fatura. `dados` traz num_fatura, data_emissao, data_vencimento,
+    cliente (linha do cadastro), placa, contrato, inicio, fim, descricao_item,
+    valor_str e valor_extenso."""
+    cliente = dados["cliente"]
+    return _modelo_fatura().substitute(
+        num_fatura=dados["num_fatura"],
+        data_emissao=dados["data_emissao"].strftime('%d/%m/%Y'),
+        data_vencimento=dados["data_vencimento"].strftime('%d/%m/%Y'),
+        cliente_nome=cliente['Nome'], cliente_endereco=cliente['Endereço'], cliente_municipio=cliente['Município'],
+        cliente_uf=cliente['UF'], cliente_cep=cliente['CEP'], cliente_documento=cliente['CPF/CNPJ'],
+        placa=dados["placa"], contrato=dados["contrato"],
+        inicio=dados["inicio"].strftime('%d/%m/%Y'), fim=dados["fim"].strftime('%d/%m/%Y'),
+        descricao_item=dados["descricao_item"], valor_str=dados["valor_str"], valor_extenso=dados["valor_extenso"],
+    )
+
+_cache_pdf = OrderedDict()
+_trava_cache_pdf = threading.Lock()
+
+@perfil.medir("renderizar_pdf", tamanho=lambda pdf, *_: len(pdf))
+def renderizar_pdf(html_string):
+    """Converte uma string HTML em PDF e retorna os bytes. Levanta ValueError se a conversão falhar."""
+    chave = hashlib.sha256(html_string.encode("UTF-8")).hexdigest()
+    with _trava_cache_pdf:
+        if chave in _cache_pdf:
+            _cache_pdf.move_to_end(chave)
+            return _cache_pdf[chave]
+    from xhtml2pdf import pisa
+    pdf_output = BytesIO()
+    pisa_status = pisa.CreatePDF(BytesIO(html_string.encode("UTF-8")), dest=pdf_output, encoding='UTF-8')
+    if pisa_status.err:
+        raise ValueError(f"Erro na conversão para PDF: {pisa_status.err}")
+    with _trava_cache_pdf:
+        _cache_pdf[chave] = pdf_output.getvalue()
+        while len(_cache_pdf) > TAMANHO_CACHE_PDF: _cache_pdf.popitem(last=False)
+    return _cache_pdf.get(chave, pdf_output.getvalue())
+
+def limpar_caches_fatura(modelo=True, pdfs=True):
+    """Descarta o modelo montado e/ou os PDFs em cache (por exemplo, após trocar o logo)."""
+    if modelo: _modelo_fatura.cache_clear()
+    if pdfs:
+        with _trava_cache_pdf: _cache_pdf.clear()
+
+def gerar_pdf_fatura(dados):
+    """Retorna (nome do arquivo, bytes do PDF) de uma fatura."""
+    return f"fatura_{dados['num_fatura']}.pdf", renderizar_pdf(montar_html_fatura(dados))
+
+
+# --- Faturas em Lote ---
+# Colunas aceitas na planilha do lote. "Cliente" pode ser o CPF/CNPJ ou o Nome.
+COLUNAS_LOTE = ["Cliente", "Placa", "Inicio", "Fim", "Valor"]
+COLUNAS_LOTE_OPCIONAIS = {"Extenso": "", "Contrato": "", "Descricao": "Diária"}
+
+# Cada processo do pool (spawn) importa pandas e xhtml2pdf ao subir: ~2-3 s,
+# o custo de 40 a 60 faturas em série (~55 ms cada). O pool é criado uma vez e
+# reaproveitado pelos lotes seguintes, quando sobra só o envio dos dados entre
+# processos (4 faturas: 211 ms no pool pronto x 219 ms em série). Medido com
+# `python benchmark.py faturas --lotes 4,16,64 --processos 2`.
+MINIMO_PARA_PARALELIZAR = 64   # lote a partir do qual vale subir o pool
+MINIMO_COM_POOL_PRONTO = 8     # com o pool já no ar
+_pool = None                   # (processos, ProcessPoolExecutor)
+_trava_pool = threading.Lock()
+
+def _converter_ou_nada(valor):
+    try: return converter_valor(valor)
+    except (TypeError, ValueError): return None
+
+def _localizar_clientes(referencias, df_clientes):
+    """Linha do cadastro de cada referência (CPF/CNPJ, com ou sem pontuação, ou Nome)."""
+    documentos = df_clientes["CPF/CNPJ"].astype(str).str.replace(r"\D", "", regex=True)
+    por_documento = pd.Series(df_clientes.index, index=documentos)
+    por_documento = por_documento[(por_documento.index != "") & ~por_documento.index.duplicated()]
+    por_nome = pd.Series(df_clientes.index, index=df_clientes["Nome"])
+    por_nome = por_nome[~por_nome.index.duplicated()]
+    referencias = referencias.astype(str).str.strip()
+    linhas = referencias.str.replace(r"\D", "", regex=True).map(por_documento).fillna(referencias.map(por_nome))
+    return df_clientes.reindex(linhas.values).set_axis(referencias.index)
+
+def preparar_lote(df_lote, df_clientes, df_veiculos):
+    """Valida as linhas do lote. Retorna (válidas com a linha do cliente anexada, rejeitadas com o motivo)."""
+    faltando = [col for col in COLUNAS_LOTE if col not in df_lote.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    lote = df_lote.copy()
+    for col, padrao in COLUNAS_LOTE_OPCIONAIS.items():
+        lote[col] = lote[col].fillna(padrao).astype(str) if col in lote.columns else padrao
+    lote["Placa"] = lote["Placa"].astype(str).str.strip().str.upper()
+    lote["Inicio"] = converter_datas(lote["Inicio"])
+    lote["Fim"] = converter_datas(lote["Fim"])
+    lote["ValorNumerico"] = pd.to_numeric(lote["Valor"].map(_converter_ou_nada), errors="coerce")
+    clientes = _localizar_clientes(lote["Cliente"], df_clientes)
+
+    motivo = pd.Series("", index=lote.index)
+    motivo[clientes["Nome"].isna()] = "cliente não encontrado"
+    motivo[(motivo == "") & ~lote["Placa"].isin(df_veiculos["Placa"])] = "placa não cadastrada"
+    motivo[(motivo == "") & (lote["Inicio"].isna() | lote["Fim"].isna())] = "período inválido"
+    motivo[(motivo == "") & (lote["Inicio"] > lote["Fim"])] = "início depois do fim"
+    motivo[(motivo == "") & ~(lote["ValorNumerico"] > 0)] = "valor inválido"
+    validas = motivo == ""
+    rejeitadas = df_lote[~validas].assign(Motivo=motivo[~validas])
+    return lote[validas].join(clientes[validas].add_prefix("cliente_")), rejeitadas
+
+@perfil.medir("emitir_lote", linhas=lambda _, df_lote, *__: len(df_lote))
+def _executor_lote(processos):
+    """Pool de `processos` processos, reaproveitado entre lotes (recriado se o tamanho mudar)."""
+    global _pool
+    with _trava_pool:
+        if _pool and _pool[0] != processos:
+            _pool[1].shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = (processos, ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn")))
+        return _pool[1]
+
+def encerrar_pool():
+    """Encerra o pool de renderização (o próximo lote grande cria outro)."""
+    global _pool
+    with _trava_pool:
+        if _pool: _pool[1].shutdown()
+        _pool = None
+
+def renderizar_lote(lista_dados, processos=None, paralelo=None):
+    """[(nome do arquivo, bytes do PDF)] de cada fatura.
+
+    Com `paralelo=None` usa o pool só com mais de um processo disponível e
+    lote grande o bastante para compensar (ver MINIMO_PARA_PARALELIZAR);
+    True ou False forçam a escolha.
+    """
+    processos = min(processos or os.cpu_count() or 1, len(lista_dados))
+    if paralelo is None:
+        minimo = MINIMO_COM_POOL_PRONTO if _pool and _pool[0] == processos else MINIMO_PARA_PARALELIZAR
+        paralelo = processos > 1 and len(lista_dados) >= minimo
+    if not paralelo:
+        return [gerar_pdf_fatura(dados) for dados in lista_dados]
+    try:
+        return list(_executor_lote(processos).map(gerar_pdf_fatura, lista_dados,
+                                                   chunksize=max(1, len(lista_dados) // (processos * 4))))
+    except BrokenProcessPool:
+        # Um processo do pool morreu (p. ex. sem memória): descarta o pool e renderiza aqui mesmo.
+        encerrar_pool()
+        return [gerar_pdf_fatura(dados) for dados in lista_dados]
+
+def emitir_lote(df_lote, df_clientes, df_veiculos, data_emissao, data_vencimento, processos=None):
+    """Emite as faturas de um lote.
+
+    Reserva um bloco contínuo de números, renderiza os PDFs em paralelo e
+    grava as transações de todas as faturas de uma vez. Retorna (ZIP em bytes,
+    transações gravadas, linhas rejeitadas).
+    """
+    validas, rejeitadas = preparar_lote(df_lote, df_clientes, df_veiculos)
+    if validas.empty:
+        return None, pd.DataFrame(columns=colunas_transacoes), rejeitadas
+    primeiro = reservar_numeros_fatura(len(validas))
+    campos_cliente = [col for col in validas.columns if col.startswith("cliente_")]
+    lista_dados = [{
+        "num_fatura": primeiro + i, "data_emissao": data_emissao, "data_vencimento": data_vencimento,
+        "cliente": {col.removeprefix("cliente_"): linha[col] for col in campos_cliente},
+        "placa": linha["Placa"], "contrato": linha["Contrato"], "inicio": linha["Inicio"], "fim": linha["Fim"],
+        "descricao_item": linha["Descricao"], "valor_str": formatar_valor(linha["ValorNumerico"]), "valor_extenso": linha["Extenso"],
+    } for i, (_, linha) in enumerate(validas.iterrows())]
+
+    pdfs = renderizar_lote(lista_dados, processos)
+    arquivo_zip = BytesIO()
+    with zipfile.ZipFile(arquivo_zip, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nome, conteudo in pdfs: zf.writestr(nome, conteudo)
+
+    transacoes = pd.DataFrame({
+        "Placa": validas["Placa"].values,
+        "Data": data_emissao.strftime('%Y-%m-%d'),
+        "Tipo": "Entrada",
+        "Valor": validas["ValorNumerico"].values,
+        "Categoria": "Aluguel",
+        "Descricao": [descricao_fatura(d["num_fatura"], d["cliente"]["Nome"], d["inicio"], d["fim"]) for d in lista_dados],
+    }, columns=colunas_transacoes)
+    anexar_dados(transacoes, ARQUIVO_TRANSACOES, colunas_transacoes)
+    return arquivo_zip.getvalue(), transacoes, rejeitadas
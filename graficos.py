@@ -0,0 +1,53 @@
+import pandas as pd
+import streamlit as st
+
+# --- Gráficos ---
+# Especificações Vega-Lite passadas como dicionário: o navegador desenha o
+# gráfico e o servidor não precisa carregar matplotlib nem altair (que o
+# st.bar_chart/st.line_chart importam), o que encurta a primeira execução.
+CORES_RECEITA_DESPESA = {"Receitas": "#4CAF50", "Despesas": "#F44336"}
+FORMATO_REAIS = ",.2f"
+
+
+def pizza(serie, rotulo="Categoria", valor="Total"):
+    """Gráfico de pizza com o percentual de cada fatia."""
+    dados = pd.DataFrame({rotulo: serie.index, valor: serie.to_numpy()})
+    st.vega_lite_chart(dados, {
+        "transform": [{"joinaggregate": [{"op": "sum", "field": valor, "as": "Soma"}]},
+                      {"calculate": f"datum['{valor}'] / datum.Soma", "as": "Percentual"}],
+        "encoding": {
+            "theta": {"field": valor, "type": "quantitative", "stack": True},
+            "color": {"field": rotulo, "type": "nominal"},
+            "tooltip": [{"field": rotulo}, {"field": valor, "format": FORMATO_REAIS}, {"field": "Percentual", "format": ".1%"}],
+        },
+        "layer": [
+            {"mark": {"type": "arc", "outerRadius": 110}},
+            {"mark": {"type": "text", "radius": 135}, "encoding": {"text": {"field": "Percentual", "type": "quantitative", "format": ".1%"}}},
+        ],
+    }, use_container_width=True)
+
+def barras(serie, rotulo, valor, cores=None, ordenar=True):
+    """Barras verticais de uma Series; `cores` ({categoria: cor}) fixa a cor de cada barra."""
+    dados = pd.DataFrame({rotulo: serie.index, valor: serie.to_numpy()})
+    cor = ({"field": rotulo, "type": "nominal", "legend": None,
+            "scale": {"domain": list(cores), "range": list(cores.values())}} if cores else {"value": "#1f77b4"})
+    st.vega_lite_chart(dados, {
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": rotulo, "type": "nominal", "sort": "-y" if ordenar else None},
+            "y": {"field": valor, "type": "quantitative", "title": f"{valor} (R$)", "axis": {"format": FORMATO_REAIS}},
+            "color": cor,
+        },
+    }, use_container_width=True)
+
+def linhas(df, eixo_x, valor="Valor", serie="Série"):
+    """Uma linha por coluna de `df`, com o índice no eixo x."""
+    dados = df.rename_axis(eixo_x).reset_index().melt(id_vars=eixo_x, var_name=serie, value_name=valor)
+    st.vega_lite_chart(dados, {
+        "mark": {"type": "line", "point": True, "tooltip": True},
+        "encoding": {
+            "x": {"field": eixo_x, "type": "ordinal"},
+            "y": {"field": valor, "type": "quantitative", "title": f"{valor} (R$)", "axis": {"format": FORMATO_REAIS}},
+            "color": {"field": serie, "type": "nominal"},
+        },
+    }, use_container_width=True)
@@ -0,0 +1,230 @@
+"""Importação em massa de clientes, veículos e transações.
+
+Uso:
+    python importacao.py clientes planilha.csv [--bloco 50000] [--rejeitadas rejeitadas.csv]
+    python importacao.py veiculos planilha.xlsx
+    python importacao.py transacoes lancamentos.csv
+
+O arquivo é lido em blocos, formatado e validado de forma vetorizada e as
+linhas aceitas são gravadas de uma só vez ao final. Linhas com problema não
+interrompem a importação: voltam num relatório com o número da linha e o motivo.
+"""
+import sys
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import busca
+import perfil
+import armazenamento
+from analise import converter_datas
+from armazenamento import (
+    ARQUIVO_CLIENTES, ARQUIVO_VEICULOS, ARQUIVO_TRANSACOES,
+    colunas_clientes, colunas_veiculos, colunas_transacoes
+)
+
+TAMANHO_BLOCO = 50_000
+PADRAO_PLACA = r"^[A-Z]{3}[0-9][A-Z0-9][0-9]{2}$"  # antiga (ABC1234) ou Mercosul (ABC1D23)
+
+
+# --- Formatação (aceita um valor ou uma Series) ---
+def _como_serie(valor):
+    if isinstance(valor, pd.Series): return valor, False
+    return pd.Series([valor]), True
+
+def _so_digitos(serie):
+    return serie.fillna("").astype(str).str.replace(r"\D", "", regex=True)
+
+def formatar_cpf_cnpj(doc):
+    serie, escalar = _como_serie(doc)
+    resultado = (_so_digitos(serie)
+                 .str.replace(r"^(\d{3})(\d{3})(\d{3})(\d{2})$", r"\1.\2.\3-\4", regex=True)
+                 .str.replace(r"^(\d{2})(\d{3})(\d{3})(\d{4})(\d{2})$", r"\1.\2.\3/\4-\5", regex=True))
+    return resultado.iloc[0] if escalar else resultado
+
+def formatar_telefone(tel):
+    serie, escalar = _como_serie(tel)
+    resultado = (_so_digitos(serie)
+                 .str.replace(r"^(\d{2})(\d{5})(\d{4})$", r"(\1) \2-\3", regex=True)
+                 .str.replace(r"^(\d{2})(\d{4})(\d{4})$", r"(\1) \2-\3", regex=True))
+    return resultado.iloc[0] if escalar else resultado
+
+def normalizar_placas(serie):
+    """Versão vetorizada de busca.normalizar_chave."""
+    return serie.fillna("").astype(str).str.replace(r"[^0-9A-Za-z]", "", regex=True).str.upper()
+
+def converter_valores(serie):
+    """Versão vetorizada de faturas.converter_valor: "2.400,00" ou "2400.00" -> float (NaN se inválido)."""
+    texto = serie.fillna("").astype(str).str.strip()
+    com_virgula = texto.str.contains(",", regex=False)
+    texto = texto.where(~com_virgula, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(texto, errors="coerce")
+
+
+# --- Validação de CPF/CNPJ ---
+PESOS_CPF = (np.arange(10, 1, -1), np.arange(11, 1, -1))
+PESOS_CNPJ = (np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]), np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+
+def _digitos_conferem(documentos, pesos):
+    """Confere os dois dígitos verificadores de documentos (strings de mesmo tamanho)."""
+    if len(documentos) == 0: return np.zeros(0, dtype=bool)
+    matriz = (np.frombuffer("".join(documentos).encode(), dtype=np.uint8).reshape(len(documentos), -1) - ord("0")).astype(np.int64)
+    valido = ~(matriz == matriz[:, :1]).all(axis=1)  # 000.000.000-00, 111.111.111-11...
+    for peso in pesos:
+        resto = (matriz[:, :len(peso)] @ peso) % 11
+        valido &= matriz[:, len(peso)] == np.where(resto < 2, 0, 11 - resto)
+    return valido
+
+def cpf_cnpj_valido(docs):
+    """True para CPFs e CNPJs com dígitos verificadores corretos (pontuação é ignorada)."""
+    digitos = _so_digitos(docs)
+    valido = pd.Series(False, index=docs.index)
+    for tamanho, pesos in ((11, PESOS_CPF), (14, PESOS_CNPJ)):
+        mascara = digitos.str.len() == tamanho
+        valido[mascara] = _digitos_conferem(digitos[mascara].tolist(), pesos)
+    return valido
+
+
+# --- Regras por Tipo de Cadastro ---
+# Cada validador recebe um bloco (texto, com as colunas do cadastro) e as chaves
+# já usadas (cadastro + blocos anteriores) e retorna (bloco formatado, motivo),
+# onde motivo é "" nas linhas aceitas.
+def _chaves_clientes():
+    return busca.chaves_cadastradas(ARQUIVO_CLIENTES)
+
+def _chaves_veiculos():
+    return busca.chaves_cadastradas(ARQUIVO_VEICULOS)
+
+def _placas_cadastradas():
+    """{placa normalizada: placa como está no cadastro}."""
+    placas = armazenamento.carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)["Placa"]
+    return dict(zip(normalizar_placas(placas), placas))
+
+def _validar_clientes(bloco, chaves):
+    bloco = bloco.assign(**{col: bloco[col].str.strip() for col in colunas_clientes})
+    documentos = _so_digitos(bloco["CPF/CNPJ"])
+    bloco["CPF/CNPJ"] = formatar_cpf_cnpj(bloco["CPF/CNPJ"])
+    bloco["Telefone"] = formatar_telefone(bloco["Telefone"])
+    bloco["UF"] = bloco["UF"].str.upper()
+    motivo = pd.Series("", index=bloco.index)
+    informado = documentos != ""
+    motivo[bloco["Nome"] == ""] = "nome obrigatório"
+    motivo[(motivo == "") & informado & ~cpf_cnpj_valido(documentos)] = "CPF/CNPJ inválido"
+    motivo[(motivo == "") & informado & documentos.isin(chaves)] = "CPF/CNPJ já cadastrado"
+    motivo[(motivo == "") & informado & documentos.duplicated()] = "CPF/CNPJ repetido no arquivo"
+    chaves.update(documentos[(motivo == "") & informado])
+    return bloco, motivo
+
+def _validar_veiculos(bloco, chaves):
+    bloco = bloco.assign(**{col: bloco[col].str.strip() for col in colunas_veiculos})
+    placas = normalizar_placas(bloco["Placa"])
+    bloco["Placa"] = placas
+    ano_informado = bloco["Ano"] != ""
+    ano = pd.to_numeric(bloco["Ano"], errors="coerce")
+    bloco["Ano"] = ano.round().astype("Int64")
+    motivo = pd.Series("", index=bloco.index)
+    motivo[placas == ""] = "placa obrigatória"
+    motivo[(motivo == "") & ~placas.str.match(PADRAO_PLACA)] = "placa inválida"
+    motivo[(motivo == "") & placas.isin(chaves)] = "placa já cadastrada"
+    motivo[(motivo == "") & placas.duplicated()] = "placa repetida no arquivo"
+    motivo[(motivo == "") & ano_informado & ~ano.between(1950, datetime.now().year + 2)] = "ano inválido"
+    chaves.update(placas[motivo == ""])
+    return bloco, motivo
+
+def _validar_transacoes(bloco, placas_cadastradas):
+    bloco = bloco.assign(**{col: bloco[col].str.strip() for col in colunas_transacoes})
+    bloco["Placa"] = normalizar_placas(bloco["Placa"]).map(placas_cadastradas)
+    datas = converter_datas(bloco["Data"])
+    bloco["Data"] = datas.dt.strftime('%Y-%m-%d')
+    bloco["Tipo"] = bloco["Tipo"].str.lower().map({"entrada": "Entrada", "saída": "Saída", "saida": "Saída"})
+    bloco["Valor"] = converter_valores(bloco["Valor"])
+    motivo = pd.Series("", index=bloco.index)
+    motivo[bloco["Placa"].isna()] = "placa não cadastrada"
+    motivo[(motivo == "") & datas.isna()] = "data inválida"
+    motivo[(motivo == "") & bloco["Tipo"].isna()] = "tipo deve ser Entrada ou Saída"
+    motivo[(motivo == "") & ~(bloco["Valor"] > 0)] = "valor inválido"
+    return bloco, motivo
+
+# tipo: (arquivo, colunas, colunas obrigatórias no arquivo, chaves já usadas, validador)
+TIPOS_IMPORTACAO = {
+    "clientes": (ARQUIVO_CLIENTES, colunas_clientes, ["Nome"], _chaves_clientes, _validar_clientes),
+    "veiculos": (ARQUIVO_VEICULOS, colunas_veiculos, ["Placa"], _chaves_veiculos, _validar_veiculos),
+    "transacoes": (ARQUIVO_TRANSACOES, colunas_transacoes, ["Placa", "Data", "Tipo", "Valor"], _placas_cadastradas, _validar_transacoes),
+}
+
+
+# --- Leitura e Gravação ---
+def ler_em_blocos(origem, tamanho_bloco=TAMANHO_BLOCO, nome=None):
+    """Gera DataFrames de texto com até `tamanho_bloco` linhas; o índice continua entre os blocos."""
+    nome = str(nome or getattr(origem, "name", origem)).lower()
+    if nome.endswith((".xlsx", ".xlsm")):
+        # O pandas não lê planilhas Excel em partes: o arquivo é lido inteiro e
+        # dividido em blocos só para a validação.
+        try:
+            df = pd.read_excel(origem, dtype=object).apply(lambda coluna: coluna.map(_texto_celula))
+        except ImportError:
+            raise ValueError("Para importar planilhas Excel instale o pacote openpyxl (ou salve a planilha como CSV).")
+        for inicio in range(0, len(df), tamanho_bloco):
+            yield df.iloc[inicio:inicio + tamanho_bloco]
+        return
+    yield from pd.read_csv(origem, dtype=str, keep_default_na=False, sep=_separador(origem),
+                           encoding="utf-8-sig", chunksize=tamanho_bloco)
+
+def _texto_celula(valor):
+    """Texto de uma célula do Excel; datas viram aaaa-mm-dd (como texto seriam "2025-03-01 00:00:00")."""
+    if pd.isna(valor): return ""
+    return valor.strftime("%Y-%m-%d") if isinstance(valor, datetime) else str(valor)
+
+def _separador(origem):
+    """Separador do CSV (vírgula, ponto e vírgula ou tab) deduzido do cabeçalho.
+
+    Deduzir aqui deixa a leitura com o parser em C do pandas; com sep=None ele
+    usaria o parser em Python, bem mais lento em arquivos grandes.
+    """
+    if hasattr(origem, "read"):
+        inicio = origem.read(4096); origem.seek(0)
+    else:
+        with open(origem, "rb") as f: inicio = f.read(4096)
+    if isinstance(inicio, bytes): inicio = inicio.decode("utf-8", errors="ignore")
+    cabecalho = inicio.splitlines()[0] if inicio else ""
+    return max([",", ";", "\t"], key=cabecalho.count)
+
+@perfil.medir("importar", linhas=lambda resultado, *_: resultado[0])
+def importar(origem, tipo, nome=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Importa um arquivo CSV/Excel. Retorna (linhas gravadas, rejeitadas com a linha do arquivo e o motivo)."""
+    nome_arquivo, colunas, obrigatorias, chaves_usadas, validar = TIPOS_IMPORTACAO[tipo]
+    chaves = chaves_usadas()
+    aceitas, rejeitadas = [], []
+    for bloco in ler_em_blocos(origem, tamanho_bloco, nome):
+        bloco.columns = bloco.columns.str.strip()
+        faltando = [col for col in obrigatorias if col not in bloco.columns]
+        if faltando:
+            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+        formatado, motivo = validar(bloco.reindex(columns=colunas, fill_value=""), chaves)
+        validas = motivo == ""
+        aceitas.append(formatado[validas])
+        rejeitadas.append(bloco[~validas].assign(Motivo=motivo[~validas]).set_axis(bloco.index[~validas] + 2).rename_axis("Linha"))
+    aceitas = [df for df in aceitas if not df.empty]
+    if aceitas:
+        armazenamento.anexar_dados(pd.concat(aceitas, ignore_index=True), nome_arquivo, colunas)
+    rejeitadas = [df for df in rejeitadas if not df.empty]
+    return sum(map(len, aceitas)), (pd.concat(rejeitadas) if rejeitadas else pd.DataFrame(columns=["Motivo"]).rename_axis("Linha"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importação em massa de cadastros e lançamentos.")
+    parser.add_argument("tipo", choices=list(TIPOS_IMPORTACAO))
+    parser.add_argument("arquivo", help="planilha CSV ou Excel (.xlsx)")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO, help="linhas lidas e validadas por vez")
+    parser.add_argument("--rejeitadas", help="grava as linhas rejeitadas neste CSV")
+    args = parser.parse_args()
+    try:
+        gravadas, rejeitadas = importar(args.arquivo, args.tipo, tamanho_bloco=args.bloco)
+    except ValueError as erro:
+        sys.exit(f"Erro: {erro}")
+    print(f"{gravadas} linha(s) importada(s), {len(rejeitadas)} rejeitada(s).")
+    if len(rejeitadas):
+        if args.rejeitadas:
+            rejeitadas.to_csv(args.rejeitadas)
+        else:
+            print(rejeitadas["Motivo"].value_counts().to_string())
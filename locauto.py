@@ -1,12 +1,25 @@
+import csv
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import os
-import base64
-import matplotlib.pyplot as plt
 from io import BytesIO
-from xhtml2pdf import pisa
-import re
+from faturas import (
+    ler_ultimo_numero_fatura, reservar_numeros_fatura, registrar_numero_fatura, montar_html_fatura, renderizar_pdf,
+    converter_valor, emitir_lote, COLUNAS_LOTE, COLUNAS_LOTE_OPCIONAIS
+)
+from resumo import resumo_veiculo, reconstruir_resumo
+from analise import analisar_frota, descricao_fatura
+from tabelas import tabela_paginada, seletor_busca, fixar_selecao, botao_excluir, resultado_exclusao
+import graficos
+import perfil
+from importacao import formatar_cpf_cnpj, formatar_telefone, cpf_cnpj_valido, importar, TIPOS_IMPORTACAO
+from busca import ids_por_chave
+from armazenamento import (
+    ARQUIVO_CLIENTES, ARQUIVO_VEICULOS, ARQUIVO_TRANSACOES,
+    colunas_clientes, colunas_veiculos, colunas_transacoes,
+    carregar_dados, anexar_dados, excluir_linhas, compactar_dados, ler_exclusoes,
+    consultar_transacoes
+)
 
 # --- Configurações da Página ---
 st.set_page_config(
@@ -15,64 +28,15 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- CONSTANTES DE ARQUIVOS ---
-ARQUIVO_CLIENTES = "clientes.csv"
-ARQUIVO_VEICULOS = "veiculos.csv"
-ARQUIVO_FATURAS = "ultima_fatura.txt"
-ARQUIVO_TRANSACOES = "transacoes.csv"
-
-
 # --- FUNÇÃO DE CONVERSÃO PARA PDF (CORRIGIDA) ---
+@perfil.medir("convert_html_to_pdf", tamanho=lambda pdf, *_: pdf.getbuffer().nbytes if pdf else None)
 def convert_html_to_pdf(html_string):
     """Converte uma string HTML em um arquivo PDF em memória."""
-    pdf_output = BytesIO()
-    # 1. Captura o resultado da função de criação do PDF
-    pisa_status = pisa.CreatePDF(
-        BytesIO(html_string.encode("UTF-8")),
-        dest=pdf_output,
-        encoding='UTF-8'
-    )
-    # 2. Verifica o atributo .err no objeto retornado
-    if pisa_status.err:
-        st.error(f"Erro na conversão para PDF: {pisa_status.err}")
-        return None
-    pdf_output.seek(0)
-    return pdf_output
-
-# --- Funções de Manipulação de Dados ---
-def ler_ultimo_numero_fatura():
     try:
-        with open(ARQUIVO_FATURAS, "r") as f: return int(f.read().strip())
-    except (FileNotFoundError, ValueError): return 0
-
-def salvar_numero_fatura(numero_usado):
-    with open(ARQUIVO_FATURAS, "w") as f: f.write(str(numero_usado))
-
-def carregar_dados(nome_arquivo, colunas):
-    if not os.path.exists(nome_arquivo):
-        df = pd.DataFrame(columns=colunas)
-        df.to_csv(nome_arquivo, index=False)
-    converters = {col: str for col in ['CPF/CNPJ', 'CEP', 'Placa', 'Telefone']}
-    return pd.read_csv(nome_arquivo, converters=converters)
-
-def salvar_dados(df, nome_arquivo):
-    df.to_csv(nome_arquivo, index=False)
-    
-def formatar_cpf_cnpj(doc):
-    doc = re.sub(r'\D', '', doc)
-    if len(doc) == 11: return f'{doc[:3]}.{doc[3:6]}.{doc[6:9]}-{doc[9:]}'
-    if len(doc) == 14: return f'{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}'
-    return doc
-
-def formatar_telefone(tel):
-    tel = re.sub(r'\D', '', tel)
-    if len(tel) == 11: return f'({tel[:2]}) {tel[2:7]}-{tel[7:]}'
-    if len(tel) == 10: return f'({tel[:2]}) {tel[2:6]}-{tel[6:]}'
-    return tel
-
-colunas_clientes = ["Nome", "CPF/CNPJ", "Endereço", "Município", "UF", "CEP", "Telefone", "Email"]
-colunas_veiculos = ["Placa", "Marca", "Modelo", "Ano", "Cor"]
-colunas_transacoes = ["Placa", "Data", "Tipo", "Valor", "Categoria", "Descricao"]
+        return BytesIO(renderizar_pdf(html_string))
+    except ValueError as erro:
+        st.error(str(erro))
+        return None
 
 # --- Páginas da Aplicação ---
 
@@ -98,19 +62,17 @@ def pagina_gerar_recibo():
     st.subheader("Cliente e Veículo")
     col_cli, col_vei = st.columns(2)
     with col_cli:
-        nomes_clientes = df_clientes_atual['Nome'].tolist()
-        cliente_selecionado_nome = st.selectbox("Selecione o Cliente", options=nomes_clientes, index=None, placeholder="Escolha um cliente...")
+        id_cliente = seletor_busca("Selecione o Cliente", ARQUIVO_CLIENTES, "fatura_cliente", "Nome, CPF/CNPJ ou município...")
     with col_vei:
-        mapa_veiculos = {row['Placa']: f"{row['Placa']} ({row['Marca']} {row['Modelo']})" for index, row in df_veiculos_atual.iterrows()}
-        opcoes_placas = list(mapa_veiculos.keys())
-        placa_selecionada = st.selectbox("Selecione o Veículo", options=opcoes_placas, index=None, placeholder="Escolha um veículo...", format_func=lambda placa: mapa_veiculos.get(placa, "Veículo inválido"))
-    
-    if not cliente_selecionado_nome or not placa_selecionada:
+        id_veiculo = seletor_busca("Selecione o Veículo", ARQUIVO_VEICULOS, "fatura_veiculo", "Placa, marca ou modelo...")
+
+    if id_cliente not in df_clientes_atual.index or id_veiculo not in df_veiculos_atual.index:
         st.info("Por favor, selecione um cliente e um veículo para continuar.")
         return
 
-    cliente_selecionado = df_clientes_atual[df_clientes_atual['Nome'] == cliente_selecionado_nome].iloc[0]
-    veiculo_selecionado = df_veiculos_atual[df_veiculos_atual['Placa'] == placa_selecionada].iloc[0]
+    cliente_selecionado = df_clientes_atual.loc[id_cliente]
+    veiculo_selecionado = df_veiculos_atual.loc[id_veiculo]
+    cliente_selecionado_nome, placa_selecionada = cliente_selecionado['Nome'], veiculo_selecionado['Placa']
 
     st.subheader("Detalhes da Locação")
     col_periodo1, col_periodo2, col_contrato = st.columns(3)
@@ -124,32 +86,15 @@ def pagina_gerar_recibo():
 
     if st.button("Gerar Fatura", type="primary"):
         try:
-            num_fatura = num_fatura_usado
-            logo_html_tag = ""
-            try:
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                logo_path = os.path.join(script_dir, "logo.png")
-                with open(logo_path, "rb") as f:
-                    logo_data = f.read()
-                    logo_base64 = base64.b64encode(logo_data).decode("utf-8")
-                    logo_html_tag = f'<img src="data:image/png;base64,{logo_base64}" class="logo">'
-            except FileNotFoundError:
-                logo_html_tag = ""
-            
-            html_recibo = f"""
-            <!DOCTYPE html><html lang="pt-BR"><head><meta name="viewport" content="width=device-width, initial-scale=1.0"><meta charset="UTF-8"><title>Fatura de Locação N° {num_fatura}</title>
-            <style> body {{ font-family: Arial, sans-serif; font-size: 12px; color: #000; }} .container {{ max-width: 800px; margin: auto; padding: 40px; }} .header {{ display: flex; justify-content: space-between; align-items: flex-start; border-bottom: 2px solid #000; padding-bottom: 10px;}} .logo-empresa-container {{ flex: 2; display: flex; align-items: center; }} .logo {{ max-height: 70px; width: auto; margin-right: 15px; }} .empresa-info p {{ margin: 3px 0; }} .fatura-box {{ flex: 1; border: 1px solid #000; padding: 5px; text-align: center; }} .fatura-box h2 {{ margin: 0; font-size: 14px; }} .fatura-box p {{ margin: 2px 0; }} .sacado-box {{ border: 1px solid #000; padding: 10px; margin-top: 10px; }} .sacado-box p {{ margin: 3px 0; }} .vencimento-box {{ border: 1px solid #000; padding: 5px; margin-top: 10px; display: flex; justify-content: space-between; }} .vencimento-box div {{ width: 50%; }} .extenso-box {{ border: 1px solid #000; padding: 5px; margin-top: 10px; }} .descricao-table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }} .descricao-table th, .descricao-table td {{ border: 1px solid #000; padding: 5px; }} .descricao-table th {{ text-align: center; }} .descricao-table .valor-col {{ text-align: right; width: 120px; }} .descricao-table .total-label {{ text-align: right; font-weight: bold; border-left: none; border-bottom: none;}} .footer {{ text-align: center; margin-top: 15px; font-size: 10px; }} strong {{ font-weight: bold; }} @media print {{ @page {{ size: A4; margin: 20mm; }} body {{ margin: 0; padding: 0; }} .container {{ border: none; box-shadow: none; width: 100%; max-width: 100%; margin: 0; padding: 0; }} }}</style></head>
-            <body><div class="container">
-                <div class="header"><div class="logo-empresa-container">{logo_html_tag}<div class="empresa-info"><strong>HT Locações Auto LTDA</strong><p>Rua dos boiadeiros, 566 - PASSOS/MG CEP 37902-018</p><p>CNPJ: 05.261.064/0001-60</p><p>FONE: (35)999817121</p></div></div><div class="fatura-box"><h2>FATURA DE LOCAÇÃO</h2><p><strong>N°:</strong> {num_fatura}</p><p><strong>Data da Emissão:</strong> {data_emissao.strftime('%d/%m/%Y')}</p></div></div>
-                <div class="sacado-box"><p><strong>Cliente:</strong> {cliente_selecionado['Nome']}</p><p><strong>Endereço:</strong> {cliente_selecionado['Endereço']}</p><p><strong>Município:</strong> {cliente_selecionado['Município']} <strong>UF:</strong> {cliente_selecionado['UF']} <strong>CEP:</strong> {cliente_selecionado['CEP']}</p><p><strong>CNPJ(MF)/CPF:</strong> {cliente_selecionado['CPF/CNPJ']}</p></div>
-                <div class="vencimento-box"><div><strong>Fatura/Duplicata Valor R$:</strong> {valor_locacao_str}</div><div><strong>Vencimento(s):</strong> {data_vencimento.strftime('%d/%m/%Y')}</div></div>
-                <div class="extenso-box"><strong>Valor por Extenso:</strong> {valor_por_extenso}</div>
-                <table class="descricao-table"><thead><tr><th>Descrição</th><th>Valor R$</th></tr></thead><tbody>
-                <tr><td>Contrato: {contrato_str} Período: {data_inicio_periodo.strftime('%d/%m/%Y')} a {data_fim_periodo.strftime('%d/%m/%Y')}<br>Placa Atual: {veiculo_selecionado['Placa']}<br>Itens/Despesas e Serviços Adicionais:<br>{desc_item} - R$ {valor_locacao_str}</td><td class="valor-col">{valor_locacao_str}</td></tr>
-                <tr><td class="total-label">Total da Fatura</td><td class="valor-col"><strong>R$ {valor_locacao_str}</strong></td></tr>
-                </tbody></table><div class="footer"><p>Atividade não sujeita ao ISSQN e à emissão de NF conforme Lei 116/03 - Item 3.01</p></div>
-            </div></body></html>
-            """
+            # Se o operador manteve o número sugerido, reserva o próximo livre agora:
+            # outra sessão pode ter emitido uma fatura enquanto esta página estava aberta.
+            num_fatura = reservar_numeros_fatura(1) if num_fatura_usado == proximo_num_sugerido else num_fatura_usado
+            html_recibo = montar_html_fatura({
+                "num_fatura": num_fatura, "data_emissao": data_emissao, "data_vencimento": data_vencimento,
+                "cliente": cliente_selecionado, "placa": veiculo_selecionado['Placa'], "contrato": contrato_str,
+                "inicio": data_inicio_periodo, "fim": data_fim_periodo, "descricao_item": desc_item,
+                "valor_str": valor_locacao_str, "valor_extenso": valor_por_extenso,
+            })
             
             st.subheader("Pré-visualização da Fatura", divider='blue')
             st.components.v1.html(html_recibo, height=600, scrolling=True)
@@ -158,36 +103,67 @@ def pagina_gerar_recibo():
             if pdf_file:
                 st.download_button(label="📄 Baixar Recibo (PDF)", data=pdf_file, file_name=f"fatura_{num_fatura}.pdf", mime="application/pdf")
             
-            valor_float = float(valor_locacao_str.replace('.', '').replace(',', '.'))
-            nova_transacao = pd.DataFrame([{"Placa": placa_selecionada, "Data": data_emissao.strftime('%Y-%m-%d'), "Tipo": "Entrada", "Valor": valor_float, "Categoria": "Aluguel", "Descricao": f"Fatura Nº {num_fatura} - Cliente: {cliente_selecionado_nome}"}])
-            df_transacoes_atual = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
-            df_transacoes_final = pd.concat([df_transacoes_atual, nova_transacao], ignore_index=True)
-            salvar_dados(df_transacoes_final, ARQUIVO_TRANSACOES)
-            if num_fatura_usado > ultimo_numero:
-                salvar_numero_fatura(num_fatura_usado)
-            st.success(f"Fatura Nº {num_fatura_usado} gerada e transação registrada na Gestão de Frotas!")
+            valor_float = converter_valor(valor_locacao_str)
+            nova_transacao = pd.DataFrame([{"Placa": placa_selecionada, "Data": data_emissao.strftime('%Y-%m-%d'), "Tipo": "Entrada", "Valor": valor_float, "Categoria": "Aluguel", "Descricao": descricao_fatura(num_fatura, cliente_selecionado_nome, data_inicio_periodo, data_fim_periodo)}])
+            anexar_dados(nova_transacao, ARQUIVO_TRANSACOES, colunas_transacoes)
+            registrar_numero_fatura(num_fatura)
+            st.success(f"Fatura Nº {num_fatura} gerada e transação registrada na Gestão de Frotas!")
         except Exception as e:
             st.error(f"Erro ao processar a fatura: {e}")
 
+def pagina_faturas_lote():
+    st.header("Emitir Faturas em Lote", divider='blue')
+    df_clientes_atual = carregar_dados(ARQUIVO_CLIENTES, colunas_clientes)
+    df_veiculos_atual = carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)
+    if df_clientes_atual.empty or df_veiculos_atual.empty:
+        st.warning("⚠️ É necessário cadastrar pelo menos um cliente e um veículo.")
+        return
+    st.info(f"Envie uma planilha CSV com as colunas {', '.join(COLUNAS_LOTE)} (opcionais: {', '.join(COLUNAS_LOTE_OPCIONAIS)}). "
+            "Em 'Cliente' use o CPF/CNPJ ou o nome cadastrado; datas em dd/mm/aaaa e valores como 2.400,00.")
+    arquivo = st.file_uploader("Planilha do lote", type=["csv"])
+    col_data_emissao, col_vencimento = st.columns(2)
+    with col_data_emissao: data_emissao = st.date_input("Data da Emissão", datetime.today())
+    with col_vencimento: data_vencimento = st.date_input("Data de Vencimento", datetime.today())
+    if arquivo is None:
+        return
+    try:
+        df_lote = pd.read_csv(arquivo, dtype=str, sep=None, engine="python")
+    except (ValueError, csv.Error) as e:
+        st.error(f"Não foi possível ler a planilha: {e}")
+        return
+    st.dataframe(df_lote, use_container_width=True)
+    if st.button(f"Emitir {len(df_lote)} Fatura(s)", type="primary"):
+        try:
+            with st.spinner("Gerando as faturas..."):
+                arquivo_zip, transacoes, rejeitadas = emitir_lote(df_lote, df_clientes_atual, df_veiculos_atual, data_emissao, data_vencimento)
+        except ValueError as e:
+            st.error(f"Erro ao processar o lote: {e}")
+            return
+        if arquivo_zip:
+            st.success(f"{len(transacoes)} fatura(s) emitida(s) e registrada(s) na Gestão de Frotas!")
+            st.download_button(label="📦 Baixar Faturas (ZIP)", data=arquivo_zip, file_name=f"faturas_{data_emissao.strftime('%Y%m%d')}.zip", mime="application/zip")
+        if not rejeitadas.empty:
+            st.warning(f"{len(rejeitadas)} linha(s) rejeitada(s):")
+            st.dataframe(rejeitadas, use_container_width=True)
+
 def pagina_gestao_frotas():
     st.header("📈 Gestão de Frotas e Financeiro", divider='rainbow')
     df_veiculos_atual = carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)
     if df_veiculos_atual.empty:
         st.warning("Nenhum veículo cadastrado.")
         return
-    lista_veiculos = [f"{row['Placa']} - {row['Marca']} {row['Modelo']}" for _, row in df_veiculos_atual.iterrows()]
-    veiculo_selecionado_str = st.selectbox("Selecione um veículo para gerenciar", options=lista_veiculos, index=None, placeholder="Escolha um veículo...")
-    if not veiculo_selecionado_str:
+    id_veiculo = seletor_busca("Selecione um veículo para gerenciar", ARQUIVO_VEICULOS, "gestao_veiculo", "Placa, marca ou modelo...")
+    if id_veiculo not in df_veiculos_atual.index:
         st.info("Selecione um veículo acima para ver sua análise financeira.")
         return
-    placa_selecionada = veiculo_selecionado_str.split(" - ")[0]
+    veiculo = df_veiculos_atual.loc[id_veiculo]
+    placa_selecionada = veiculo['Placa']
+    veiculo_selecionado_str = f"{placa_selecionada} - {veiculo['Marca']} {veiculo['Modelo']}"
     st.subheader(f"Análise Financeira: {veiculo_selecionado_str}")
-    df_transacoes_atual = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
-    df_transacoes_veiculo = df_transacoes_atual[df_transacoes_atual['Placa'] == placa_selecionada].copy()
-    if not df_transacoes_veiculo.empty:
-        df_transacoes_veiculo['Valor'] = pd.to_numeric(df_transacoes_veiculo['Valor'])
-    total_receitas = df_transacoes_veiculo[df_transacoes_veiculo['Tipo'] == 'Entrada']['Valor'].sum()
-    total_despesas = df_transacoes_veiculo[df_transacoes_veiculo['Tipo'] == 'Saída']['Valor'].sum()
+    df_transacoes_veiculo = consultar_transacoes(placa=placa_selecionada)
+    resumo = resumo_veiculo(placa_selecionada)
+    total_receitas = resumo['receitas']
+    total_despesas = resumo['despesas']
     lucro_prejuizo = total_receitas - total_despesas
     col1, col2, col3 = st.columns(3)
     col1.metric("✅ Total de Receitas", f"R$ {total_receitas:,.2f}")
@@ -197,18 +173,13 @@ def pagina_gestao_frotas():
     col_graf1, col_graf2 = st.columns(2)
     with col_graf1:
         st.subheader("Composição das Despesas")
-        despesas_por_cat = df_transacoes_veiculo[df_transacoes_veiculo['Tipo'] == 'Saída'].groupby('Categoria')['Valor'].sum()
-        if not despesas_por_cat.empty:
-            fig1, ax1 = plt.subplots()
-            ax1.pie(despesas_por_cat, labels=despesas_por_cat.index, autopct='%1.1f%%', startangle=90)
-            ax1.axis('equal'); st.pyplot(fig1); plt.close(fig1)
+        despesas_por_cat = resumo['despesas_por_categoria']
+        if not despesas_por_cat.empty: graficos.pizza(despesas_por_cat)
         else: st.info("Nenhuma despesa registrada para este veículo.")
     with col_graf2:
         st.subheader("Receitas vs. Despesas")
         if total_receitas > 0 or total_despesas > 0:
-            fig2, ax2 = plt.subplots()
-            ax2.bar(['Receitas', 'Despesas'], [total_receitas, total_despesas], color=['#4CAF50', '#F44336'])
-            ax2.set_ylabel('Valor (R$)'); st.pyplot(fig2); plt.close(fig2)
+            graficos.barras(pd.Series({'Receitas': total_receitas, 'Despesas': total_despesas}), "Tipo", "Valor", cores=graficos.CORES_RECEITA_DESPESA, ordenar=False)
         else: st.info("Nenhuma receita ou despesa registrada.")
     st.divider()
     with st.expander("➕ Lançar Nova Transação"):
@@ -221,26 +192,72 @@ def pagina_gestao_frotas():
             descricao = st.text_area("Descrição")
             if st.form_submit_button("Registrar Transação"):
                 nova_transacao = pd.DataFrame([{"Placa": placa_selecionada, "Data": data.strftime('%Y-%m-%d'),"Tipo": tipo, "Valor": valor, "Categoria": categoria, "Descricao": descricao}])
-                df_completo = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
-                df_final = pd.concat([df_completo, nova_transacao], ignore_index=True)
-                salvar_dados(df_final, ARQUIVO_TRANSACOES)
+                anexar_dados(nova_transacao, ARQUIVO_TRANSACOES, colunas_transacoes)
                 st.success("Transação registrada!"); st.rerun()
     st.subheader("Histórico de Transações")
-    st.dataframe(df_transacoes_veiculo.sort_values(by="Data", ascending=False), use_container_width=True)
+    df_pagina = tabela_paginada(df_transacoes_veiculo, "historico_transacoes", colunas_texto=("Descricao", "Categoria"), ordenar_por="Data", crescente=False, filtros_transacao=True)
     st.divider()
     st.subheader("🗑️ Excluir Lançamento Financeiro")
+    def excluir_lancamento(fixado):
+        excluir_linhas(ARQUIVO_TRANSACOES, fixado.index, conferir=fixado)
+        return "Lançamento excluído."
+    rotular = lambda df: df.index.astype(str) + ": " + df['Data'] + " - " + df['Categoria'].fillna("") + " (R$ " + df['Valor'].map('{:.2f}'.format) + ")"
     if not df_transacoes_veiculo.empty:
-        mapa = {f"{idx}: {row['Data']} - {row['Categoria']} (R$ {row['Valor']:.2f})": idx for idx, row in df_transacoes_veiculo.iterrows()}
-        selecionado = st.selectbox("Selecione o lançamento para excluir", options=list(mapa.keys()), index=None, placeholder="Escolha um lançamento...")
-        if selecionado:
-            st.warning(f"**Atenção:** Excluir o lançamento '{selecionado}'?")
-            if st.button("Confirmar Exclusão", type="primary"):
-                idx_excluir = mapa[selecionado]
-                df_completo = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
-                df_completo = df_completo.drop(idx_excluir)
-                salvar_dados(df_completo, ARQUIVO_TRANSACOES)
-                st.success("Lançamento excluído."); st.rerun()
+        rotulos = dict(zip(df_pagina.index, rotular(df_pagina)))
+        id_excluir = st.selectbox("Selecione o lançamento para excluir (da página exibida acima)", options=list(rotulos), index=None, key="excluir_lancamento",
+                                  format_func=lambda idx: rotulos.get(idx, "Lançamento não encontrado"), placeholder="Escolha um lançamento...")
+        fixado = fixar_selecao("excluir_lancamento", df_transacoes_veiculo, id_excluir)
+        if fixado is not None:
+            st.warning(f"**Atenção:** Excluir o lançamento '{rotular(fixado).iloc[0]}'?")
+            botao_excluir("excluir_lancamento", "Confirmar Exclusão", excluir_lancamento)
     else: st.info("Nenhum lançamento para excluir.")
+    resultado_exclusao("excluir_lancamento")
+    arquivos_dados = {ARQUIVO_CLIENTES: colunas_clientes, ARQUIVO_VEICULOS: colunas_veiculos, ARQUIVO_TRANSACOES: colunas_transacoes}
+    pendentes = sum(len(ler_exclusoes(arquivo)) for arquivo in arquivos_dados)
+    with st.expander("🧹 Manutenção do Histórico"):
+        if pendentes:
+            st.caption(f"{pendentes} registro(s) excluído(s) ainda nos arquivos. Exclusões são apenas anotadas para manter a gravação rápida; a compactação reescreve os arquivos sem elas.")
+            if st.button("Compactar Agora"):
+                descartadas = sum(compactar_dados(arquivo, colunas) for arquivo, colunas in arquivos_dados.items())
+                st.success(f"{descartadas} linha(s) removida(s) dos arquivos."); st.rerun()
+        st.caption("Os totais e gráficos vêm de um resumo atualizado a cada lançamento. Se os arquivos forem editados fora do sistema, recalcule-o.")
+        if st.button("Recalcular Resumo Financeiro"):
+            reconstruir_resumo()
+            st.success("Resumo recalculado."); st.rerun()
+
+def pagina_visao_frota():
+    st.header("🚙 Visão Geral da Frota", divider='rainbow')
+    df_veiculos_atual = carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)
+    if df_veiculos_atual.empty:
+        st.warning("Nenhum veículo cadastrado.")
+        return
+    hoje = datetime.today()
+    col_inicio, col_fim = st.columns(2)
+    with col_inicio: data_inicio = st.date_input("Início do Período de Análise", hoje.replace(year=hoje.year - 1))
+    with col_fim: data_fim = st.date_input("Fim do Período de Análise", hoje)
+    if data_inicio > data_fim:
+        st.error("O início do período deve ser anterior ao fim.")
+        return
+    df_transacoes_atual = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
+    por_veiculo, mensal = analisar_frota(df_transacoes_atual, df_veiculos_atual, data_inicio, data_fim)
+    total_receitas, total_despesas = por_veiculo['Receitas'].sum(), por_veiculo['Despesas'].sum()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("✅ Receitas da Frota", f"R$ {total_receitas:,.2f}")
+    col2.metric("❌ Despesas da Frota", f"R$ {total_despesas:,.2f}")
+    col3.metric("💰 Lucro da Frota", f"R$ {total_receitas - total_despesas:,.2f}")
+    col4.metric("📅 Utilização Média", f"{por_veiculo['Utilização (%)'].mean():.1f}%")
+    st.divider()
+    col_graf1, col_graf2 = st.columns(2)
+    with col_graf1:
+        st.subheader("Lucro por Veículo")
+        graficos.barras(por_veiculo['Lucro'], "Placa", "Lucro")
+    with col_graf2:
+        st.subheader("Evolução Mensal")
+        if not mensal.empty: graficos.linhas(mensal, "Mês")
+        else: st.info("Nenhuma transação no período.")
+    st.subheader("Resultado por Veículo")
+    st.dataframe(por_veiculo.sort_values('Lucro', ascending=False), use_container_width=True,
+                 column_config={col: st.column_config.NumberColumn(format="R$ %.2f") for col in ['Receitas', 'Despesas', 'Lucro']} | {'Utilização (%)': st.column_config.NumberColumn(format="%.1f%%")})
 
 def pagina_cadastrar_cliente():
     st.header("Cadastro de Novos Clientes", divider='green')
@@ -257,28 +274,29 @@ def pagina_cadastrar_cliente():
         email = st.text_input("Email")
         if st.form_submit_button("Cadastrar Cliente"):
             if not nome: st.error("O campo 'Nome Completo' é obrigatório.")
+            elif cpf_cnpj.strip() and not cpf_cnpj_valido(pd.Series([cpf_cnpj])).iloc[0]: st.error("CPF/CNPJ inválido: confira os dígitos.")
             else:
                 cpf_cnpj_formatado = formatar_cpf_cnpj(cpf_cnpj)
                 telefone_formatado = formatar_telefone(telefone)
-                df_clientes_atual = carregar_dados(ARQUIVO_CLIENTES, colunas_clientes)
                 novo_cliente = pd.DataFrame([[nome, cpf_cnpj_formatado, endereco, municipio, uf.upper(), cep, telefone_formatado, email]], columns=colunas_clientes)
-                df_atualizado = pd.concat([df_clientes_atual, novo_cliente], ignore_index=True)
-                salvar_dados(df_atualizado, ARQUIVO_CLIENTES)
+                anexar_dados(novo_cliente, ARQUIVO_CLIENTES, colunas_clientes)
                 st.success(f"✅ Cliente '{nome}' cadastrado com sucesso!")
     st.subheader("Clientes Cadastrados")
     df_clientes_atual = carregar_dados(ARQUIVO_CLIENTES, colunas_clientes)
-    st.dataframe(df_clientes_atual, use_container_width=True)
+    tabela_paginada(df_clientes_atual, "tabela_clientes", colunas_texto=("Nome", "CPF/CNPJ", "Município", "Email"), ordenar_por="Nome")
     st.divider()
     st.subheader("🗑️ Excluir Cliente")
+    def excluir_cliente(df_excluir):
+        excluir_linhas(ARQUIVO_CLIENTES, df_excluir.index, conferir=df_excluir)
+        return f"Cliente '{df_excluir.iloc[0]['Nome']}' excluído com sucesso!"
     if not df_clientes_atual.empty:
-        cliente_para_excluir = st.selectbox("Selecione o cliente que deseja excluir", options=df_clientes_atual['Nome'], index=None, placeholder="Escolha um cliente...")
-        if cliente_para_excluir:
-            st.warning(f"**Atenção:** Tem certeza que deseja excluir o cliente **{cliente_para_excluir}**? Esta ação não pode ser desfeita.")
-            if st.button("Confirmar Exclusão Definitiva do Cliente", type="primary"):
-                df_filtrado = df_clientes_atual[df_clientes_atual['Nome'] != cliente_para_excluir]
-                salvar_dados(df_filtrado, ARQUIVO_CLIENTES)
-                st.success(f"Cliente '{cliente_para_excluir}' excluído com sucesso!"); st.rerun()
+        id_excluir = seletor_busca("Selecione o cliente que deseja excluir", ARQUIVO_CLIENTES, "excluir_cliente", "Nome ou CPF/CNPJ...")
+        df_excluir = fixar_selecao("excluir_cliente", df_clientes_atual, id_excluir)
+        if df_excluir is not None:
+            st.warning(f"**Atenção:** Tem certeza que deseja excluir o cliente **{df_excluir.iloc[0]['Nome']}**? Esta ação não pode ser desfeita.")
+            botao_excluir("excluir_cliente", "Confirmar Exclusão Definitiva do Cliente", excluir_cliente)
     else: st.info("Nenhum cliente cadastrado para excluir.")
+    resultado_exclusao("excluir_cliente")
 
 def pagina_cadastrar_veiculo():
     st.header("Cadastro de Novos Veículos", divider='orange')
@@ -291,41 +309,92 @@ def pagina_cadastrar_veiculo():
         if st.form_submit_button("Cadastrar Veículo"):
             if not placa: st.error("O campo 'Placa' é obrigatório.")
             else:
-                df_atual = carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)
                 placa_str = str(placa).upper()
-                if placa_str in df_atual['Placa'].values: st.error(f"A placa '{placa_str}' já está cadastrada.")
+                if ids_por_chave(ARQUIVO_VEICULOS, placa_str): st.error(f"A placa '{placa_str}' já está cadastrada.")
                 else:
                     novo = pd.DataFrame([[placa_str, marca, modelo, ano, cor]], columns=colunas_veiculos)
-                    df_final = pd.concat([df_atual, novo], ignore_index=True)
-                    salvar_dados(df_final, ARQUIVO_VEICULOS)
+                    anexar_dados(novo, ARQUIVO_VEICULOS, colunas_veiculos)
                     st.success(f"✅ Veículo placa '{placa_str}' cadastrado!")
     st.subheader("Veículos Cadastrados")
     df_veiculos = carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)
-    st.dataframe(df_veiculos, use_container_width=True)
+    tabela_paginada(df_veiculos, "tabela_veiculos", colunas_texto=("Placa", "Marca", "Modelo", "Cor"), ordenar_por="Placa")
     st.divider()
     st.subheader("🗑️ Excluir Veículo")
+    def excluir_veiculo(fixado):
+        # Segue a placa do aviso, não o id (que muda se o arquivo for compactado)
+        veiculo = fixado.iloc[0]; placa = veiculo['Placa']
+        df_v = carregar_dados(ARQUIVO_VEICULOS, colunas_veiculos)
+        df_excluir = df_v[df_v['Placa'] == placa]
+        df_t_excluir = consultar_transacoes(placa=placa)
+        excluir_linhas(ARQUIVO_VEICULOS, df_excluir.index, conferir=df_excluir)
+        excluir_linhas(ARQUIVO_TRANSACOES, df_t_excluir.index, conferir=df_t_excluir)
+        return f"Veículo '{placa} - {veiculo['Marca']} {veiculo['Modelo']}' e seus dados foram excluídos."
     if not df_veiculos.empty:
-        veiculo_excluir_str = st.selectbox("Selecione o veículo para excluir", options=[f"{r['Placa']} - {r['Marca']} {r['Modelo']}" for i, r in df_veiculos.iterrows()], index=None, placeholder="Escolha um veículo...")
-        if veiculo_excluir_str:
-            placa_excluir = veiculo_excluir_str.split(" - ")[0]
-            st.warning(f"**ATENÇÃO MÁXIMA:** Excluir o veículo **{veiculo_excluir_str}** irá apagar **TODOS** os seus lançamentos financeiros. Deseja continuar?")
-            if st.button("Confirmar Exclusão Definitiva", type="primary"):
-                df_v_filtrado = df_veiculos[df_veiculos['Placa'] != placa_excluir]
-                salvar_dados(df_v_filtrado, ARQUIVO_VEICULOS)
-                df_t_atual = carregar_dados(ARQUIVO_TRANSACOES, colunas_transacoes)
-                df_t_filtrado = df_t_atual[df_t_atual['Placa'] != placa_excluir]
-                salvar_dados(df_t_filtrado, ARQUIVO_TRANSACOES)
-                st.success(f"Veículo '{veiculo_excluir_str}' e seus dados foram excluídos."); st.rerun()
+        id_excluir = seletor_busca("Selecione o veículo para excluir", ARQUIVO_VEICULOS, "excluir_veiculo", "Placa, marca ou modelo...")
+        fixado = fixar_selecao("excluir_veiculo", df_veiculos, id_excluir)
+        if fixado is not None:
+            veiculo = fixado.iloc[0]
+            st.warning(f"**ATENÇÃO MÁXIMA:** Excluir o veículo **{veiculo['Placa']} - {veiculo['Marca']} {veiculo['Modelo']}** irá apagar **TODOS** os seus lançamentos financeiros. Deseja continuar?")
+            botao_excluir("excluir_veiculo", "Confirmar Exclusão Definitiva", excluir_veiculo)
     else: st.info("Nenhum veículo para excluir.")
+    resultado_exclusao("excluir_veiculo")
+
+def pagina_importar_dados():
+    st.header("Importar Dados de Outro Sistema", divider='violet')
+    rotulos = {"clientes": "Clientes", "veiculos": "Veículos", "transacoes": "Transações"}
+    tipo = st.radio("O que deseja importar?", list(TIPOS_IMPORTACAO), format_func=rotulos.get, horizontal=True)
+    _, colunas, obrigatorias, _, _ = TIPOS_IMPORTACAO[tipo]
+    st.info(f"Envie uma planilha CSV ou Excel com as colunas {', '.join(colunas)} (obrigatórias: {', '.join(obrigatorias)}). "
+            "CPF/CNPJ e telefone podem vir só com números; datas em dd/mm/aaaa ou aaaa-mm-dd e valores como 2.400,00. "
+            + ("Importe os veículos antes das transações." if tipo == "transacoes" else ""))
+    arquivo = st.file_uploader("Planilha", type=["csv", "xlsx"], key=f"importar_{tipo}")
+    if arquivo is None:
+        return
+    if st.button(f"Importar {rotulos[tipo]}", type="primary"):
+        try:
+            with st.spinner("Validando e gravando..."):
+                gravadas, rejeitadas = importar(arquivo, tipo, nome=arquivo.name)
+        except ValueError as e:
+            st.error(f"Erro ao importar: {e}")
+            return
+        st.success(f"✅ {gravadas} linha(s) importada(s).")
+        if not rejeitadas.empty:
+            st.warning(f"{len(rejeitadas)} linha(s) rejeitada(s) (o número da linha é o do arquivo):")
+            st.dataframe(rejeitadas.head(1000), use_container_width=True)
+            st.download_button("⬇️ Baixar Linhas Rejeitadas (CSV)", data=rejeitadas.to_csv().encode("utf-8-sig"), file_name=f"rejeitadas_{tipo}.csv", mime="text/csv")
 
 # --- NAVEGAÇÃO PRINCIPAL ---
 st.sidebar.title("Navegação Principal")
 paginas = {
     "Gerar Fatura": pagina_gerar_recibo,
+    "Faturas em Lote": pagina_faturas_lote,
     "Gestão de Frotas": pagina_gestao_frotas,
+    "Visão da Frota": pagina_visao_frota,
     "Cadastrar Cliente": pagina_cadastrar_cliente,
-    "Cadastrar Veículo": pagina_cadastrar_veiculo
+    "Cadastrar Veículo": pagina_cadastrar_veiculo,
+    "Importar Dados": pagina_importar_dados
 }
-captions = ["Emita recibos de locação", "Análise financeira por veículo", "Adicione ou veja clientes", "Adicione ou veja veículos"]
+captions = ["Emita recibos de locação", "Fature vários contratos de uma vez", "Análise financeira por veículo", "Resultados de todos os veículos", "Adicione ou veja clientes", "Adicione ou veja veículos", "Migre planilhas em massa"]
 pagina_selecionada = st.sidebar.radio("Escolha uma opção", paginas.keys(), captions=captions)
-paginas[pagina_selecionada]()
+
+# --- PERFIL DE DESEMPENHO ---
+painel_perfil = st.sidebar.expander("⏱️ Perfil de Desempenho", expanded=perfil.ativo())
+# O perfil é global no servidor: o botão mostra o estado atual e só o altera quando
+# é clicado, para que a execução de outra sessão não desfaça a escolha.
+st.session_state["perfil_ativo"] = perfil.ativo()
+with painel_perfil:
+    st.toggle("Medir tempos", key="perfil_ativo", on_change=lambda: perfil.ativar(st.session_state["perfil_ativo"]),
+              help="Vale para todas as sessões deste servidor. Também pode ser ligado com LOCAUTO_PERFIL=1.")
+marca_perfil = perfil.marcar()
+perfil.medir(f"página: {pagina_selecionada}")(paginas[pagina_selecionada])()
+if perfil.ativo():
+    with painel_perfil:
+        st.caption(f"Esta execução · log em {perfil.ARQUIVO_PERFIL}")
+        st.dataframe(perfil.resumir(perfil.registros(desde=marca_perfil)), hide_index=True,
+                     column_order=["Operação", "Chamadas", "Total (ms)", "Máximo (ms)", "Linhas", "Bytes"],
+                     column_config={col: st.column_config.NumberColumn(format="%.1f") for col in ["Total (ms)", "Máximo (ms)"]})
+        st.caption("Acumulado desde que o servidor subiu")
+        st.dataframe(perfil.resumir(perfil.registros()), hide_index=True,
+                     column_order=["Operação", "Chamadas", "Média (ms)", "Máximo (ms)", "Erros"],
+                     column_config={col: st.column_config.NumberColumn(format="%.1f") for col in ["Média (ms)", "Máximo (ms)"]})
+        if st.button("Limpar registros", key="perfil_limpar"): perfil.limpar(); st.rerun()
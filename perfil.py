@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import functools
+import threading
+from datetime import datetime
+from collections import deque
+
+# --- Perfil de Desempenho (opcional) ---
+# Desligado, `medir` só acrescenta uma verificação de flag a cada chamada.
+# Ligado (LOCAUTO_PERFIL=1 ou pelo painel na barra lateral), cada chamada das
+# funções medidas vira um registro com duração, linhas e bytes lidos ou
+# gravados, guardado em memória para o painel e anexado ao log JSONL.
+ARQUIVO_PERFIL = os.environ.get("LOCAUTO_PERFIL_ARQUIVO", "perfil.jsonl")
+REGISTROS_EM_MEMORIA = 5000
+
+_ativo = os.environ.get("LOCAUTO_PERFIL", "").lower() in ("1", "sim", "true", "on")
+_registros = deque(maxlen=REGISTROS_EM_MEMORIA)
+_sequencia = 0
+_trava = threading.Lock()
+
+
+def ativo():
+    return _ativo
+
+def ativar(ligar=True):
+    global _ativo
+    _ativo = bool(ligar)
+
+def registrar(operacao, segundos, linhas=None, bytes_=None, erro=None):
+    """Guarda um registro em memória e no log JSONL."""
+    global _sequencia
+    with _trava:
+        _sequencia += 1
+        registro = {"seq": _sequencia, "momento": datetime.now().isoformat(timespec="milliseconds"), "pid": os.getpid(),
+                    "operacao": operacao, "ms": round(segundos * 1000, 3), "linhas": linhas, "bytes": bytes_}
+        if erro: registro["erro"] = erro
+        _registros.append(registro)
+        try:
+            with open(ARQUIVO_PERFIL, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # o log é auxiliar: sem permissão de escrita o painel continua funcionando
+
+def _tamanho_arquivo(caminho):
+    try: return os.path.getsize(caminho)
+    except (OSError, TypeError): return None
+
+def medir(operacao, linhas=None, tamanho=None, arquivo=None, modo="lido"):
+    """Decorador que registra cada chamada quando o perfil está ativo.
+
+    `linhas(resultado, *args)` e `tamanho(resultado, *args)` extraem a
+    quantidade de linhas e de bytes da chamada. Alternativamente
+    `arquivo(*args)` indica o arquivo tocado: no modo "lido" ou "gravado"
+    conta o tamanho final dele, no modo "anexado" quanto ele cresceu.
+    """
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            caminho = arquivo(*args) if arquivo else None
+            antes = _tamanho_arquivo(caminho) if modo == "anexado" else None
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*args, **kwargs)
+            except Exception as erro:
+                registrar(operacao, time.perf_counter() - inicio, erro=f"{type(erro).__name__}: {erro}")
+                raise
+            segundos = time.perf_counter() - inicio
+            try:
+                qtd_linhas = linhas(resultado, *args) if linhas else None
+                qtd_bytes = tamanho(resultado, *args) if tamanho else _tamanho_arquivo(caminho)
+                if antes is not None and qtd_bytes is not None: qtd_bytes -= antes
+            except Exception:
+                qtd_linhas = qtd_bytes = None
+            registrar(operacao, segundos, qtd_linhas, qtd_bytes)
+            return resultado
+        return medida
+    return decorar
+
+
+# --- Consulta dos Registros ---
+def marcar():
+    """Número do último registro; use com `registros(desde=...)` para isolar um trecho."""
+    return _sequencia
+
+def registros(desde=0):
+    with _trava:
+        return [registro for registro in _registros if registro["seq"] > desde]
+
+def limpar():
+    with _trava: _registros.clear()
+
+def resumir(lista):
+    """Totais por operação (chamadas, tempo total/médio/máximo, linhas e bytes), do mais lento ao mais rápido."""
+    totais = {}
+    for registro in lista:
+        total = totais.setdefault(registro["operacao"], {"Operação": registro["operacao"], "Chamadas": 0, "Total (ms)": 0.0,
+                                                         "Máximo (ms)": 0.0, "Linhas": 0, "Bytes": 0, "Erros": 0})
+        total["Chamadas"] += 1
+        total["Total (ms)"] += registro["ms"]
+        total["Máximo (ms)"] = max(total["Máximo (ms)"], registro["ms"])
+        total["Linhas"] += registro["linhas"] or 0
+        total["Bytes"] += registro["bytes"] or 0
+        total["Erros"] += "erro" in registro
+    for total in totais.values():
+        total["Média (ms)"] = total["Total (ms)"] / total["Chamadas"]
+    return sorted(totais.values(), key=lambda total: -total["Total (ms)"])
@@ -0,0 +1,80 @@
+import pandas as pd
+import perfil
+import armazenamento
+from armazenamento import ARQUIVO_TRANSACOES, colunas_transacoes
+
+# --- Resumo Financeiro por Veículo ---
+# Totais por veículo, mês, tipo e categoria. No SQLite o resumo é a tabela
+# "resumo_transacoes" mantida por gatilhos; nos arquivos CSV é uma estrutura
+# em memória derivada das transações, atualizada a cada inclusão ou exclusão.
+# Em ambos os casos ler o resumo de um veículo não percorre as transações.
+CHAVE_RESUMO = ["Mes", "Tipo", "Categoria"]
+
+
+def _agrupar(df):
+    """Agrupa transações em {placa: {(mes, tipo, categoria): [total, quantidade]}}."""
+    if df.empty: return {}
+    chaves = pd.DataFrame({
+        "Placa": df["Placa"].fillna(""),
+        "Mes": df["Data"].fillna("").str[:7],
+        "Tipo": df["Tipo"].fillna(""),
+        "Categoria": df["Categoria"].fillna(""),
+        "Valor": df["Valor"].fillna(0.0),
+    })
+    grupos = chaves.groupby(["Placa"] + CHAVE_RESUMO, sort=False)["Valor"].agg(["sum", "count"])
+    agrupado = {}
+    for (placa, mes, tipo, categoria), total, quantidade in zip(grupos.index, grupos["sum"], grupos["count"]):
+        agrupado.setdefault(placa, {})[(mes, tipo, categoria)] = [float(total), int(quantidade)]
+    return agrupado
+
+def _construir(df):
+    return _agrupar(df)
+
+def _incluir(resumo, df_novos):
+    for placa, grupos in _agrupar(df_novos).items():
+        do_veiculo = resumo.setdefault(placa, {})
+        for chave, (total, quantidade) in grupos.items():
+            acumulado = do_veiculo.setdefault(chave, [0.0, 0])
+            acumulado[0] += total; acumulado[1] += quantidade
+
+def _excluir(resumo, df_removidos):
+    for placa, grupos in _agrupar(df_removidos).items():
+        do_veiculo = resumo.get(placa, {})
+        for chave, (total, quantidade) in grupos.items():
+            acumulado = do_veiculo.get(chave)
+            if acumulado is None: continue
+            acumulado[0] -= total; acumulado[1] -= quantidade
+            if acumulado[1] <= 0: del do_veiculo[chave]
+        if not do_veiculo: resumo.pop(placa, None)
+
+armazenamento.registrar_derivado(ARQUIVO_TRANSACOES, "resumo", _construir, _incluir, _excluir)
+
+
+def _linhas_veiculo(placa):
+    """DataFrame (Mes, Tipo, Categoria, Total, Quantidade) com o resumo de um veículo."""
+    if armazenamento.usando_sqlite():
+        return armazenamento.consultar_sqlite(
+            "SELECT Mes, Tipo, Categoria, Total, Quantidade FROM resumo_transacoes WHERE Placa = ?", [placa])
+    linhas = armazenamento.consultar_derivado(
+        ARQUIVO_TRANSACOES, colunas_transacoes, "resumo",
+        lambda resumo: [(*chave, total, quantidade) for chave, (total, quantidade) in resumo.get(placa, {}).items()])
+    return pd.DataFrame(linhas, columns=CHAVE_RESUMO + ["Total", "Quantidade"])
+
+@perfil.medir("resumo_veiculo")
+def resumo_veiculo(placa):
+    """Receitas, despesas e despesas por categoria de um veículo."""
+    linhas = _linhas_veiculo(placa)
+    entradas = linhas[linhas["Tipo"] == "Entrada"]
+    saidas = linhas[linhas["Tipo"] == "Saída"]
+    return {
+        "receitas": float(entradas["Total"].sum()),
+        "despesas": float(saidas["Total"].sum()),
+        "despesas_por_categoria": saidas.groupby("Categoria")["Total"].sum(),
+    }
+
+def reconstruir_resumo():
+    """Recalcula o resumo a partir de todas as transações."""
+    if armazenamento.usando_sqlite():
+        armazenamento.reconstruir_resumo_sqlite()
+    else:
+        armazenamento.descartar_derivado(ARQUIVO_TRANSACOES, "resumo")
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import busca
+
+# --- Tabelas Paginadas ---
+# Filtro e ordenação rodam no servidor sobre as colunas necessárias; só as
+# linhas da página visível são copiadas e enviadas ao navegador.
+TAMANHOS_PAGINA = [25, 50, 100, 250]
+
+
+def filtrar(df, texto="", colunas_texto=(), data_inicio=None, data_fim=None, categorias=(), tipos=()):
+    """Máscara booleana (numpy) das linhas que atendem a todos os filtros informados."""
+    mascara = np.ones(len(df), dtype=bool)
+    if texto:
+        encontrou = np.zeros(len(df), dtype=bool)
+        for col in colunas_texto:
+            encontrou |= df[col].astype(str).str.contains(texto, case=False, regex=False, na=False).to_numpy()
+        mascara &= encontrou
+    if data_inicio is not None:
+        mascara &= (df["Data"] >= pd.Timestamp(data_inicio).strftime('%Y-%m-%d')).to_numpy()
+    if data_fim is not None:
+        mascara &= (df["Data"] <= pd.Timestamp(data_fim).strftime('%Y-%m-%d')).to_numpy()
+    if categorias:
+        mascara &= df["Categoria"].isin(categorias).to_numpy()
+    if tipos:
+        mascara &= df["Tipo"].isin(tipos).to_numpy()
+    return mascara
+
+def recortar_pagina(df, mascara, ordenar_por=None, crescente=True, pagina=1, tamanho=TAMANHOS_PAGINA[0]):
+    """Retorna (linhas da página, total de linhas filtradas) sem materializar o resultado inteiro."""
+    posicoes = np.flatnonzero(mascara)
+    if ordenar_por is not None and len(posicoes):
+        chaves = df[ordenar_por].iloc[posicoes]
+        if pd.api.types.is_numeric_dtype(chaves): chaves = chaves.to_numpy(dtype=float, na_value=np.nan)
+        else: chaves = chaves.fillna("").astype(str).to_numpy()
+        ordem = np.argsort(chaves, kind="stable")
+        posicoes = posicoes[ordem if crescente else ordem[::-1]]
+    inicio = (pagina - 1) * tamanho
+    return df.iloc[posicoes[inicio:inicio + tamanho]], len(posicoes)
+
+def tabela_paginada(df, chave, colunas_texto=(), ordenar_por=None, crescente=True, filtros_transacao=False):
+    """Mostra `df` com busca, filtros, ordenação e paginação. Retorna as linhas da página visível."""
+    texto, data_inicio, data_fim, categorias, tipos = "", None, None, (), ()
+    with st.container(border=True):
+        col_busca, col_ordem, col_sentido = st.columns([3, 2, 1])
+        with col_busca:
+            if colunas_texto: texto = st.text_input("🔎 Buscar", key=f"{chave}_busca", placeholder=f"Buscar em {', '.join(colunas_texto)}")
+        with col_ordem:
+            colunas = list(df.columns)
+            ordenar_por = st.selectbox("Ordenar por", colunas, index=colunas.index(ordenar_por) if ordenar_por in colunas else 0, key=f"{chave}_ordem")
+        with col_sentido:
+            crescente = st.radio("Sentido", ["↑", "↓"], index=0 if crescente else 1, key=f"{chave}_sentido", horizontal=True) == "↑"
+        if filtros_transacao:
+            col_ini, col_fim, col_cat, col_tipo = st.columns(4)
+            with col_ini: data_inicio = st.date_input("De", value=None, key=f"{chave}_de", format="DD/MM/YYYY")
+            with col_fim: data_fim = st.date_input("Até", value=None, key=f"{chave}_ate", format="DD/MM/YYYY")
+            with col_cat: categorias = st.multiselect("Categoria", sorted(set(df["Categoria"]) - {""}), key=f"{chave}_categorias")
+            with col_tipo: tipos = st.multiselect("Tipo", ["Entrada", "Saída"], key=f"{chave}_tipos")
+    mascara = filtrar(df, texto, colunas_texto, data_inicio, data_fim, categorias, tipos)
+    total = int(mascara.sum())
+    col_tamanho, col_pagina, col_info = st.columns([1, 1, 2])
+    with col_tamanho: tamanho = st.selectbox("Linhas por página", TAMANHOS_PAGINA, key=f"{chave}_tamanho")
+    paginas = max(1, -(-total // tamanho))
+    if st.session_state.get(f"{chave}_pagina", 1) > paginas:
+        st.session_state[f"{chave}_pagina"] = paginas
+    with col_pagina: pagina = st.number_input("Página", min_value=1, max_value=paginas, step=1, key=f"{chave}_pagina")
+    with col_info: st.caption(f"{total} registro(s) encontrado(s) de {len(df)} · página {pagina} de {paginas}")
+    df_pagina, _ = recortar_pagina(df, mascara, ordenar_por, crescente, pagina, tamanho)
+    st.dataframe(df_pagina, use_container_width=True)
+    return df_pagina
+
+
+# --- Seletores com Busca ---
+# Em vez de enviar a tabela inteira para o selectbox a cada execução, o
+# operador digita parte do nome, documento, placa ou modelo e o índice de
+# busca devolve só os registros mais parecidos.
+def seletor_busca(rotulo, nome_arquivo, chave, placeholder="Digite para buscar...", limite=None):
+    """Campo de busca + selectbox com os melhores resultados. Retorna o id da linha escolhida ou None."""
+    texto = st.text_input(f"🔎 {rotulo}", key=f"{chave}_texto", placeholder=placeholder)
+    resultados = dict(busca.buscar(nome_arquivo, texto, limite or busca.LIMITE_RESULTADOS))
+    if not resultados:
+        st.caption("Nenhum registro encontrado.")
+        return None
+    return st.selectbox(rotulo, options=list(resultados), index=None, key=chave, placeholder="Escolha um dos resultados...",
+                        format_func=lambda idx: resultados.get(idx, "Registro não encontrado"), label_visibility="collapsed")
+
+def fixar_selecao(chave, df, idx):
+    """A linha `idx` de `df` como estava quando foi escolhida no seletor `chave`.
+
+    A cópia fica em st.session_state até outro registro ser escolhido, de modo
+    que o clique de confirmação (outra execução do script) age sobre o registro
+    que o aviso exibiu, mesmo que uma compactação tenha feito o id apontar
+    para outra linha.
+    """
+    if idx is None or idx not in df.index:
+        st.session_state.pop(f"{chave}_fixado", None)
+        return None
+    fixado = st.session_state.get(f"{chave}_fixado")
+    if fixado is None or fixado.index[0] != idx:
+        fixado = st.session_state[f"{chave}_fixado"] = df.loc[[idx]]
+    return fixado
+
+def botao_excluir(chave, rotulo, excluir):
+    """Botão que chama `excluir(fixado)` com a cópia guardada por `fixar_selecao`.
+
+    A exclusão roda no callback do clique, antes de o script executar de novo
+    (e antes de a cópia poder ser refeita), e o seletor é limpo em seguida para
+    o próximo clique não valer para outro registro. `excluir` retorna a
+    mensagem de sucesso; um ValueError vira mensagem de erro. As duas são
+    exibidas por `resultado_exclusao`.
+    """
+    def confirmar():
+        fixado = st.session_state.pop(f"{chave}_fixado", None)
+        st.session_state[chave] = None
+        if fixado is None: return
+        try:
+            st.session_state[f"{chave}_resultado"] = ("success", excluir(fixado))
+        except ValueError as e:
+            st.session_state[f"{chave}_resultado"] = ("error", str(e))
+    st.button(rotulo, type="primary", key=f"{chave}_confirmar", on_click=confirmar)
+
+def resultado_exclusao(chave):
+    """Exibe uma vez o resultado do último clique em `botao_excluir`."""
+    resultado = st.session_state.pop(f"{chave}_resultado", None)
+    if resultado: getattr(st, resultado[0])(resultado[1])